@@ -0,0 +1,297 @@
+"""
+Benchmarks for :func:`convert.save`, :func:`convert.load` and :func:`convert.convert_file`.
+
+The benchmarks run over all supported file extension combinations and several sizes, data types
+and densities. Wall time, throughput and peak resident memory are recorded and saved as JSON.
+Results can be compared with a stored baseline to detect performance regressions.
+
+The package `convert` must be importable, e.g. installed or in the ``PYTHONPATH``. Example::
+
+    python benchmarks/benchmark.py --output results.json
+    python benchmarks/benchmark.py --baseline results.json --tolerance 0.2
+
+Timings depend on the machine, so no baseline is stored in the repository. To check a release
+for regressions, check out the previous release, record a baseline on the machine that runs
+the comparison, and then compare the release with it on the same machine::
+
+    git checkout <previous release>
+    python benchmarks/benchmark.py --output baseline.json
+    git checkout <release>
+    python benchmarks/benchmark.py --baseline baseline.json
+
+All supported file extension combinations are run with the default sizes, which takes a long
+time. Use ``--extensions``, ``--sizes``, ``--dtypes`` and ``--densities`` to restrict the run to
+the cases of interest, with the same options for the baseline and the comparison.
+"""
+
+import argparse
+import fnmatch
+import json
+import pathlib
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import scipy
+import scipy.sparse
+
+import convert
+import convert.numpy
+import convert.scipy
+import convert.universal
+
+
+# *** constants *** #
+
+DEFAULT_SIZES = (1000, 100000)
+DEFAULT_DTYPES = ('float64', 'int64', 'complex128')
+DEFAULT_DENSITIES = (0.01, 0.1)
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.25
+
+DENSE_COLUMNS = 4
+SPARSE_COLUMNS = 10
+
+
+# *** values *** #
+
+def dense_value(size, dtype, seed=0):
+    """ Returns a dense array with `size` rows. """
+    rng = np.random.default_rng(seed)
+    shape = (size, DENSE_COLUMNS)
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'c':
+        return (rng.random(shape) + 1j * rng.random(shape)).astype(dtype)
+    elif dtype.kind in 'iu':
+        return rng.integers(0, 1000, shape).astype(dtype)
+    else:
+        return rng.random(shape).astype(dtype)
+
+
+def sparse_value(size, dtype, density, seed=0):
+    """ Returns a sparse matrix with `size` rows, `SPARSE_COLUMNS` columns and about `density`
+    * `size` * `SPARSE_COLUMNS` entries. The number of columns is fixed, so that converting the
+    matrix into a dense array needs memory linear in `size`. """
+    rng = np.random.default_rng(seed)
+    entries = max(1, int(density * size * SPARSE_COLUMNS))
+    row = rng.integers(0, size, entries)
+    col = rng.integers(0, SPARSE_COLUMNS, entries)
+    data = dense_value(entries, dtype, seed=seed)[:, 0]
+    return scipy.sparse.coo_matrix((data, (row, col)), shape=(size, SPARSE_COLUMNS)).tocsr()
+
+
+def value_bytes(value):
+    if scipy.sparse.issparse(value):
+        value = value.tocsr()
+        return value.data.nbytes + value.indices.nbytes + value.indptr.nbytes
+    return value.nbytes
+
+
+# *** measurement *** #
+
+def _reset_peak_rss():
+    # resets VmHWM on Linux, otherwise the peak of the whole process is reported
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _peak_rss():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def measure(function, repeat):
+    """ Returns the best wall time of `repeat` calls of `function` and the peak RSS. """
+    seconds = float('inf')
+    _reset_peak_rss()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = min(seconds, time.perf_counter() - start)
+    return seconds, _peak_rss()
+
+
+def _record(operation, file_extension, other_file_extension, kind, dtype, size, density,
+            value, function, repeat):
+    record = {'operation': operation,
+              'file_extension': file_extension,
+              'other_file_extension': other_file_extension,
+              'kind': kind,
+              'dtype': str(dtype),
+              'size': size,
+              'density': density,
+              'bytes': value_bytes(value)}
+    try:
+        seconds, peak_rss = measure(function, repeat)
+    except Exception as error:
+        record['error'] = f'{type(error).__name__}: {error}'
+    else:
+        record['seconds'] = seconds
+        record['throughput_mb_s'] = record['bytes'] / seconds / 2**20 if seconds > 0 else None
+        record['peak_rss_mb'] = peak_rss / 2**20
+    return record
+
+
+# *** benchmarks *** #
+
+def _cases(file_extensions, sizes, dtypes, densities):
+    for module in convert.universal.SUPPORTED_MODULES:
+        module_file_extensions = [file_extension for file_extension in module.FILE_EXTENSIONS
+                                  if file_extension in file_extensions]
+        if len(module_file_extensions) == 0:
+            continue
+        is_sparse = module is convert.scipy
+        for size in sizes:
+            for dtype in dtypes:
+                for density in (densities if is_sparse else (None,)):
+                    if is_sparse:
+                        value = sparse_value(size, dtype, density)
+                    else:
+                        value = dense_value(size, dtype)
+                    kind = 'sparse' if is_sparse else 'dense'
+                    yield module_file_extensions, kind, dtype, size, density, value
+
+
+def run(file_extensions=None, sizes=DEFAULT_SIZES, dtypes=DEFAULT_DTYPES,
+        densities=DEFAULT_DENSITIES, repeat=DEFAULT_REPEAT, verbose=False):
+    """ Runs all benchmarks and returns the records as list of dicts. """
+    if file_extensions is None:
+        file_extensions = convert.universal.SUPPORTED_FILE_EXTENSIONS
+    combinations = set(convert.universal.SUPPORTED_FILE_EXTENSION_COMBINATIONS)
+    records = []
+
+    def add(record):
+        records.append(record)
+        if verbose:
+            print(format_record(record), file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = pathlib.Path(tmp_dir)
+        for module_file_extensions, kind, dtype, size, density, value in _cases(
+                file_extensions, sizes, dtypes, densities):
+            for file_extension in module_file_extensions:
+                file = tmp_dir / ('value' + file_extension)
+                add(_record('save', file_extension, None, kind, dtype, size, density, value,
+                            lambda: convert.save(file, value), repeat))
+                if not file.exists():
+                    continue
+                add(_record('load', file_extension, None, kind, dtype, size, density, value,
+                            lambda: convert.load(file), repeat))
+                for other_file_extension in file_extensions:
+                    if (file_extension, other_file_extension) not in combinations:
+                        continue
+                    other_file = tmp_dir / ('converted' + other_file_extension)
+                    add(_record('convert', file_extension, other_file_extension, kind, dtype,
+                                size, density, value,
+                                lambda: convert.convert_file(file, other_file), repeat))
+                    if other_file.exists():
+                        other_file.unlink()
+                file.unlink()
+    return records
+
+
+def metadata():
+    return {'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'scipy': scipy.__version__,
+            'convert': convert.__version__}
+
+
+# *** comparison *** #
+
+def _key(record):
+    return (record['operation'], record['file_extension'], record['other_file_extension'],
+            record['kind'], record['dtype'], record['size'], record['density'])
+
+
+def compare(records, baseline_records, tolerance=DEFAULT_TOLERANCE):
+    """ Returns pairs `(record, baseline_record)` for which `record` is slower by more than
+    `tolerance` (relative) than `baseline_record`. """
+    baseline_dict = {_key(record): record for record in baseline_records if 'seconds' in record}
+    regressions = []
+    for record in records:
+        baseline_record = baseline_dict.get(_key(record))
+        if baseline_record is not None and 'seconds' in record:
+            if record['seconds'] > baseline_record['seconds'] * (1 + tolerance):
+                regressions.append((record, baseline_record))
+    return regressions
+
+
+def format_record(record):
+    name = record['operation'] + ' ' + record['file_extension']
+    if record['other_file_extension'] is not None:
+        name += ' -> ' + record['other_file_extension']
+    case = f"{record['kind']} {record['dtype']} size={record['size']}"
+    if record['density'] is not None:
+        case += f" density={record['density']}"
+    if 'error' in record:
+        return f'{name:40} {case:50} {record["error"]}'
+    throughput = record['throughput_mb_s']
+    throughput = f'{throughput:10.1f} MB/s' if throughput is not None else ' ' * 15
+    return (f'{name:40} {case:50} {record["seconds"]:10.4f} s {throughput} '
+            f'{record["peak_rss_mb"]:10.1f} MB peak RSS')
+
+
+# *** main *** #
+
+def _main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark load, save and convert for all supported file extensions.')
+    parser.add_argument('--extensions', type=str, nargs='+', default=None,
+                        help='Glob patterns of file extensions to benchmark. Default: all.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Number of rows of the values.')
+    parser.add_argument('--dtypes', type=str, nargs='+', default=DEFAULT_DTYPES,
+                        help='Data types of the values.')
+    parser.add_argument('--densities', type=float, nargs='+', default=DEFAULT_DENSITIES,
+                        help='Densities of the sparse matrices.')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='Number of repetitions of each measurement. The best is recorded.')
+    parser.add_argument('--output', type=str, default=None,
+                        help='JSON file where the results are saved.')
+    parser.add_argument('--baseline', type=str, default=None,
+                        help='JSON file with results to compare with.')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Relative slowdown compared to the baseline which is reported as regression.')
+    args = parser.parse_args()
+
+    file_extensions = None
+    if args.extensions is not None:
+        file_extensions = [file_extension
+                           for file_extension in convert.universal.SUPPORTED_FILE_EXTENSIONS
+                           if any(fnmatch.fnmatchcase(file_extension, pattern)
+                                  for pattern in args.extensions)]
+
+    records = run(file_extensions=file_extensions, sizes=args.sizes, dtypes=args.dtypes,
+                  densities=args.densities, repeat=args.repeat, verbose=True)
+
+    if args.output is not None:
+        with open(args.output, mode='w') as f:
+            json.dump({'metadata': metadata(), 'results': records}, f, indent=1)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline_records = json.load(f)['results']
+        regressions = compare(records, baseline_records, tolerance=args.tolerance)
+        for record, baseline_record in regressions:
+            print(f'Regression: {format_record(record)} (baseline {baseline_record["seconds"]:.4f} s)')
+        if len(regressions) > 0:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,164 @@
+import asyncio
+import functools
+import threading
+
+import convert.universal
+
+
+# *** executor *** #
+
+async def _run(function, executor=None, semaphore=None):
+    """ Runs `function` in `executor` and cancels its atomic writes if the task is cancelled. """
+    loop = asyncio.get_running_loop()
+    cancel_event = threading.Event()
+    lock = threading.Lock()
+    started = False
+
+    def release():
+        try:
+            loop.call_soon_threadsafe(semaphore.release)
+        except RuntimeError:
+            # event loop is already closed
+            pass
+
+    def run():
+        nonlocal started
+        with lock:
+            if cancel_event.is_set():
+                return None
+            started = True
+        convert.universal._thread_state.cancel_event = cancel_event
+        try:
+            return function()
+        finally:
+            convert.universal._thread_state.cancel_event = None
+            if semaphore is not None:
+                release()
+
+    if semaphore is not None:
+        await semaphore.acquire()
+    try:
+        return await loop.run_in_executor(executor, run)
+    except asyncio.CancelledError:
+        with lock:
+            cancel_event.set()
+            release_now = not started
+        # the semaphore is released by the thread if it was already started
+        if semaphore is not None and release_now:
+            semaphore.release()
+        raise
+
+
+# *** load, save and convert functions *** #
+
+async def load(file, executor=None, semaphore=None, **kwargs):
+    """
+    Loads a value without blocking the event loop.
+
+    Parameters
+    ----------
+    file : str or pathlib.Path
+        The file that should be loaded.
+    executor : concurrent.futures.Executor, optional
+        The executor in which the file is loaded. It has to run the functions in the current
+        process, e.g. a :class:`concurrent.futures.ThreadPoolExecutor`.
+        Default: the default executor of the event loop.
+    semaphore : asyncio.Semaphore, optional
+        A semaphore which bounds the number of concurrently running loads, saves and conversions
+        that share it. Default: no bound.
+    **kwargs
+        Further keyword arguments passed to :func:`convert.load`.
+
+    Returns
+    -------
+    object
+        The value stored in `file`.
+    """
+
+    function = functools.partial(convert.universal.load, file, **kwargs)
+    return await _run(function, executor=executor, semaphore=semaphore)
+
+
+async def save(file, value, executor=None, semaphore=None, **kwargs):
+    """
+    Saves a value without blocking the event loop.
+
+    If the task is cancelled, `file` is not replaced and the partially written temporary file is
+    removed as soon as the running write returns.
+
+    Parameters
+    ----------
+    file : str or pathlib.Path
+        The file where `value` should be saved.
+    value : object
+        The value that should be saved.
+    executor : concurrent.futures.Executor, optional
+        The executor in which the file is saved (see :func:`load`).
+    semaphore : asyncio.Semaphore, optional
+        A semaphore which bounds the number of concurrent operations (see :func:`load`).
+    **kwargs
+        Further keyword arguments passed to :func:`convert.save`.
+    """
+
+    function = functools.partial(convert.universal.save, file, value, **kwargs)
+    return await _run(function, executor=executor, semaphore=semaphore)
+
+
+async def convert_file(file_from, file_to, executor=None, semaphore=None, **kwargs):
+    """
+    Converts a file into another file without blocking the event loop.
+
+    If the task is cancelled, `file_to` is not replaced and the partially written temporary file
+    is removed as soon as the running conversion returns.
+
+    Parameters
+    ----------
+    file_from : str or pathlib.Path
+        The file that should be converted.
+    file_to : str or pathlib.Path
+        The file to which `file_from` should be converted.
+    executor : concurrent.futures.Executor, optional
+        The executor in which the file is converted (see :func:`load`).
+    semaphore : asyncio.Semaphore, optional
+        A semaphore which bounds the number of concurrent operations (see :func:`load`).
+    **kwargs
+        Further keyword arguments passed to :func:`convert.convert_file`.
+
+    Returns
+    -------
+    str or pathlib.Path
+        The converted file.
+    """
+
+    function = functools.partial(convert.universal.convert_file, file_from, file_to, **kwargs)
+    return await _run(function, executor=executor, semaphore=semaphore)
+
+
+async def convert_file_extension(file, file_extension, executor=None, semaphore=None, **kwargs):
+    """
+    Converts a file into another file with another file extension without blocking the event loop.
+
+    Cancellation is handled as in :func:`convert_file`.
+
+    Parameters
+    ----------
+    file : str or pathlib.Path
+        The file that should be converted.
+    file_extension : str
+        The new file extension (see :func:`convert.convert_file_extension`).
+    executor : concurrent.futures.Executor, optional
+        The executor in which the file is converted (see :func:`load`).
+    semaphore : asyncio.Semaphore, optional
+        A semaphore which bounds the number of concurrent operations (see :func:`load`).
+    **kwargs
+        Further keyword arguments passed to :func:`convert.convert_file_extension`.
+
+    Returns
+    -------
+    str
+        The converted file.
+    """
+
+    function = functools.partial(convert.universal.convert_file_extension, file, file_extension,
+                                 **kwargs)
+    return await _run(function, executor=executor, semaphore=semaphore)
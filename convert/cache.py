@@ -0,0 +1,232 @@
+import os
+
+
+# *** constants *** #
+
+DEFAULT_MAX_SIZE = 2**30
+DEFAULT_LOAD_CACHE_MAX_SIZE = 2**30
+
+
+# *** conversion cache *** #
+
+class ConversionCache:
+    """
+    An on-disk cache of converted files.
+
+    Each converted file is stored under a key derived from the device, inode, size and
+    modification time of the original file, the file extension of the converted file and the
+    options of the conversion. If a file with the same key is converted again, the stored file is
+    copied or hard linked instead. The least recently used files are removed if the size of the
+    cache exceeds its maximal size.
+
+    Parameters
+    ----------
+    directory : str or pathlib.Path
+        The directory where the converted files are stored. It is created if it does not exist.
+    max_size : int, optional
+        The maximal number of bytes of all stored files. Default: 1 GiB.
+    hardlink : bool, optional
+        If true, the stored files are hard linked to the converted files if possible instead of
+        being copied. The converted files must then not be modified in place because this would
+        also modify the stored files. A converted file which replaces a file with another mode is
+        copied so that it keeps this mode. Default: false.
+    """
+
+    def __init__(self, directory, max_size=None, hardlink=False):
+        if max_size is None:
+            max_size = DEFAULT_MAX_SIZE
+        self.directory = os.fspath(directory)
+        self.max_size = max_size
+        self.hardlink = hardlink
+
+    def __repr__(self):
+        return (f'{type(self).__name__}({self.directory!r}, max_size={self.max_size!r}, '
+                f'hardlink={self.hardlink!r})')
+
+    def key(self, file_from, file_extension_to, **options):
+        """ Returns the key of the conversion of `file_from` into a file with `file_extension_to`. """
+        import hashlib
+        import convert
+        stat = os.stat(file_from)
+        data = repr((convert.__version__, stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns,
+                     file_extension_to, sorted(options.items())))
+        return hashlib.sha256(data.encode()).hexdigest() + file_extension_to
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key)
+
+    def _transfer(self, file_from, file_to):
+        import shutil
+        if self.hardlink:
+            try:
+                os.link(file_from, file_to)
+            except OSError:
+                pass
+            else:
+                return
+        shutil.copyfile(file_from, file_to)
+
+    def get(self, key, file_to):
+        """ Saves the stored file with `key` as `file_to` and returns whether it is stored. """
+        entry = self._entry(key)
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            return False
+        if os.path.lexists(file_to):
+            os.remove(file_to)
+        try:
+            self._transfer(entry, file_to)
+        except FileNotFoundError:
+            # removed by another process in the meantime
+            return False
+        return True
+
+    def put(self, key, file):
+        """ Stores `file` with `key` and removes least recently used files if necessary. """
+        import tempfile
+        os.makedirs(self.directory, exist_ok=True)
+        file_descriptor, tmp_file = tempfile.mkstemp(dir=self.directory, prefix='.')
+        os.close(file_descriptor)
+        try:
+            os.remove(tmp_file)
+            self._transfer(file, tmp_file)
+            os.replace(tmp_file, self._entry(key))
+        except BaseException:
+            if os.path.lexists(tmp_file):
+                os.remove(tmp_file)
+            raise
+        self.evict()
+
+    def evict(self):
+        """ Removes least recently used files until the cache does not exceed its maximal size. """
+        entries = []
+        with os.scandir(self.directory) as directory_entries:
+            for directory_entry in directory_entries:
+                if not directory_entry.name.startswith('.'):
+                    try:
+                        stat = directory_entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime_ns, stat.st_size, directory_entry.path))
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, entry in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(entry)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+
+
+def conversion_cache(cache):
+    """ Returns `cache` as :class:`ConversionCache`, also if it is passed as directory. """
+    if cache is None or isinstance(cache, ConversionCache):
+        return cache
+    return ConversionCache(cache)
+
+
+# *** load cache *** #
+
+
+def _value_arrays(value):
+    """ Returns the arrays holding `value` or None if it is neither an array nor a sparse matrix. """
+    import sys
+    numpy = sys.modules.get('numpy')
+    if numpy is None:
+        return None
+    if isinstance(value, numpy.ndarray):
+        arrays = [value]
+    else:
+        scipy_sparse = sys.modules.get('scipy.sparse')
+        if scipy_sparse is None or not scipy_sparse.issparse(value):
+            return None
+        arrays = [array for array in vars(value).values() if isinstance(array, numpy.ndarray)]
+        if len(arrays) == 0:
+            return None
+    if any(array.dtype.hasobject for array in arrays):
+        return None
+    return arrays
+
+
+class LoadCache:
+    """
+    An in-memory cache of loaded values.
+
+    Arrays and sparse matrices are cached under the resolved path of their file and the load
+    options. A cached value is only used as long as the modification time and the size of its
+    file are unchanged. The least recently used values are removed if the size of all cached
+    values exceeds the maximal size. Values larger than the maximal size are not cached.
+
+    All arrays and sparse matrices are returned read-only, also if they are not cached, so they
+    can not be changed by mistake. Other values, like the mapping of an `.npz` file with several
+    arrays, are neither cached nor read-only.
+
+    Parameters
+    ----------
+    max_size : int, optional
+        The maximal number of bytes of all cached values. Default: 1 GiB.
+    """
+
+    def __init__(self, max_size=None):
+        import collections
+        import threading
+        if max_size is None:
+            max_size = DEFAULT_LOAD_CACHE_MAX_SIZE
+        self.max_size = max_size
+        self.size = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f'{type(self).__name__}(max_size={self.max_size!r})'
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """ Removes all cached values. """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self.size -= size
+
+    def load(self, file, load_function, **options):
+        """ Returns the cached value of `file` or the value returned by `load_function` which is
+        then cached. """
+        # slices are not hashable
+        options = {name: (value.start, value.stop, value.step) if isinstance(value, slice) else value
+                   for name, value in options.items()}
+        key = (os.path.realpath(file), tuple(sorted(options.items())))
+        stat = os.stat(file)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        # cached value
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == stamp:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                self._remove(key)
+
+        # load value
+        value = load_function()
+        arrays = _value_arrays(value)
+        if arrays is not None:
+            for array in arrays:
+                array.setflags(write=False)
+            size = sum(array.nbytes for array in arrays)
+            if size <= self.max_size:
+                with self._lock:
+                    if key in self._entries:
+                        self._remove(key)
+                    self._entries[key] = (stamp, value, size)
+                    self.size += size
+                    while self.size > self.max_size:
+                        self._remove(next(iter(self._entries)))
+        return value
@@ -1,3 +1,6 @@
+import collections
+import importlib.util
+import io
 import pathlib
 
 import convert.universal
@@ -8,33 +11,300 @@ import convert.universal
 GZIP_FILE_EXTENSION = '.gz'
 BZ2_FILE_EXTENSION = '.bz2'
 LZMA_FILE_EXTENSION = '.xz'
+ZSTD_FILE_EXTENSION = '.zst'
+LZ4_FILE_EXTENSION = '.lz4'
+
+# zstd and lz4 are only supported if the optional packages are available
+OPTIONAL_REQUIRED_PACKAGES = {ZSTD_FILE_EXTENSION: 'zstandard',
+                              LZ4_FILE_EXTENSION: 'lz4'}
 
 FILE_EXTENSIONS = (GZIP_FILE_EXTENSION,
                    BZ2_FILE_EXTENSION,
-                   LZMA_FILE_EXTENSION)
+                   LZMA_FILE_EXTENSION) + tuple(
+    file_extension for file_extension, package in OPTIONAL_REQUIRED_PACKAGES.items()
+    if importlib.util.find_spec(package) is not None)
+
+COMPRESSION_LEVEL_PRESETS = {
+    'fast': {GZIP_FILE_EXTENSION: 1, BZ2_FILE_EXTENSION: 1, LZMA_FILE_EXTENSION: 0,
+             ZSTD_FILE_EXTENSION: 1, LZ4_FILE_EXTENSION: 0},
+    'balanced': {GZIP_FILE_EXTENSION: 6, BZ2_FILE_EXTENSION: 6, LZMA_FILE_EXTENSION: 3,
+                 ZSTD_FILE_EXTENSION: 3, LZ4_FILE_EXTENSION: 4},
+    'small': {GZIP_FILE_EXTENSION: 9, BZ2_FILE_EXTENSION: 9, LZMA_FILE_EXTENSION: 9,
+              ZSTD_FILE_EXTENSION: 19, LZ4_FILE_EXTENSION: 16},
+}
+
+DEFAULT_COMPRESSION_LEVELS = {GZIP_FILE_EXTENSION: 9, BZ2_FILE_EXTENSION: 9, LZMA_FILE_EXTENSION: 6,
+                              ZSTD_FILE_EXTENSION: 3, LZ4_FILE_EXTENSION: 0}
+
+PARALLEL_BLOCK_SIZE = 2**22
+RECOMPRESS_BLOCK_SIZE = 2**22
+
+
+# *** compression level *** #
+
+def compression_level(file_extension, level=None):
+    if level is None:
+        return DEFAULT_COMPRESSION_LEVELS[file_extension]
+    elif isinstance(level, str):
+        try:
+            preset = COMPRESSION_LEVEL_PRESETS[level]
+        except KeyError:
+            raise ValueError(f'Unknown compression level preset {level}. Only '
+                             f'{tuple(COMPRESSION_LEVEL_PRESETS)} are supported.')
+        return preset[file_extension]
+    else:
+        return int(level)
+
+
+# *** parallel compression *** #
+
+class ParallelCompressedFile(io.BufferedIOBase):
+    """ A write-only file which compresses independent blocks in a thread pool.
+
+    Each block is compressed into a complete gzip member, bz2 stream, xz stream or lz4 frame. The
+    blocks are written in order so the resulting file is a standard multi-member or multi-stream file
+    which can be decompressed by the usual tools and by :func:`compress_file_object`.
+    """
+
+    def __init__(self, file, compress_function, threads, block_size=None):
+        import concurrent.futures
+        super().__init__()
+        if block_size is None:
+            block_size = PARALLEL_BLOCK_SIZE
+        self._file = open(file, mode='wb')
+        self._compress_function = compress_function
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=threads)
+        self._max_pending = 2 * threads
+        self._pending = collections.deque()
+        self._block_size = block_size
+        self._buffer = bytearray()
+        self._block_number = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError('I/O operation on closed file.')
+        with memoryview(data) as view, view.cast('B') as view:
+            size = view.nbytes
+            start = 0
+            # fill up buffered block
+            if len(self._buffer) > 0:
+                start = min(size, self._block_size - len(self._buffer))
+                self._buffer += view[:start]
+                if len(self._buffer) == self._block_size:
+                    self._submit(bytes(self._buffer))
+                    self._buffer = bytearray()
+            # submit complete blocks directly
+            while size - start >= self._block_size:
+                self._submit(bytes(view[start:start + self._block_size]))
+                start += self._block_size
+            # buffer remainder
+            self._buffer += view[start:]
+        return size
+
+    def _submit(self, block):
+        self._pending.append(self._executor.submit(self._compress_function, block))
+        self._block_number += 1
+        while len(self._pending) > self._max_pending:
+            self._file.write(self._pending.popleft().result())
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if len(self._buffer) > 0 or self._block_number == 0:
+                self._submit(bytes(self._buffer))
+                self._buffer = bytearray()
+            while len(self._pending) > 0:
+                self._file.write(self._pending.popleft().result())
+        finally:
+            for future in self._pending:
+                future.cancel()
+            self._executor.shutdown()
+            self._file.close()
+            super().close()
+
+
+def _compress_function(file_extension, level):
+    if file_extension == GZIP_FILE_EXTENSION:
+        import gzip
+
+        def compress_function(data):
+            return gzip.compress(data, compresslevel=level)
+    elif file_extension == BZ2_FILE_EXTENSION:
+        import bz2
+
+        def compress_function(data):
+            return bz2.compress(data, compresslevel=level)
+    elif file_extension == LZMA_FILE_EXTENSION:
+        import lzma
+
+        def compress_function(data):
+            return lzma.compress(data, preset=level)
+    elif file_extension == LZ4_FILE_EXTENSION:
+        import lz4.frame
+
+        def compress_function(data):
+            return lz4.frame.compress(data, compression_level=level)
+    else:
+        assert False
+    return compress_function
+
+
+def _parallel_compress_file_object(file, mode, level, threads):
+    file_object = ParallelCompressedFile(file, _compress_function(file.suffix, level), threads)
+    if 't' in mode:
+        file_object = io.TextIOWrapper(file_object)
+    return file_object
+
+
+# *** zstd *** #
+
+class _ZstdDecompressReader(io.RawIOBase):
+    """ A raw reader of all frames of a zstd file which rewinds for backward seeks. A passed file
+    object instead of a file is not closed. """
+
+    def __init__(self, file):
+        import zstandard
+        super().__init__()
+        self._close_file = not hasattr(file, 'read')
+        if self._close_file:
+            file = open(file, mode='rb')
+        self._file = file
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._reader = self._decompressor.stream_reader(self._file, read_across_frames=True)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._reader.readinto(buffer)
+
+    def tell(self):
+        return self._reader.tell()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.tell()
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation('Seeking relative to the end is not supported.')
+        if offset < self.tell():
+            self._file.seek(0)
+            self._reader = self._decompressor.stream_reader(self._file, read_across_frames=True)
+        return self._reader.seek(offset)
+
+    def close(self):
+        if not self.closed:
+            try:
+                self._reader.close()
+            finally:
+                if self._close_file:
+                    self._file.close()
+                super().close()
+
+
+class _ZstdReadFile(io.BufferedIOBase):
+    """ A buffered reader of a zstd file like :class:`gzip.GzipFile` in read mode. """
+
+    def __init__(self, file):
+        super().__init__()
+        self._buffer = io.BufferedReader(_ZstdDecompressReader(file))
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def read(self, size=-1):
+        return self._buffer.read(size)
+
+    def read1(self, size=-1):
+        return self._buffer.read1(size)
+
+    def readinto(self, buffer):
+        return self._buffer.readinto(buffer)
+
+    def readline(self, size=-1):
+        return self._buffer.readline(size)
+
+    def peek(self, size=0):
+        return self._buffer.peek(size)
+
+    def tell(self):
+        return self._buffer.tell()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._buffer.seek(offset, whence)
+
+    def close(self):
+        if not self.closed:
+            try:
+                self._buffer.close()
+            finally:
+                super().close()
+
+
+def _zstd_file_object(file, mode, level, threads, file_object=None):
+    if mode.startswith('w'):
+        import zstandard
+        if threads is None or threads <= 1:
+            threads = 0
+        compressor = zstandard.ZstdCompressor(level=level, threads=threads)
+        return zstandard.open(file, mode=mode, cctx=compressor)
+    else:
+        file_object = _ZstdReadFile(file if file_object is None else file_object)
+        if 't' in mode:
+            file_object = io.TextIOWrapper(file_object)
+        return file_object
 
 
 # *** load and save functions *** #
 
-def compress_file_object(file, mode='r'):
+def compress_file_object(file, mode='r', level=None, threads=None, file_object=None):
     file = pathlib.Path(file)
     file_extension = file.suffix
+    if file_extension not in FILE_EXTENSIONS:
+        raise convert.universal.UnsupportedFileExtensionError(file, supported_file_extensions=FILE_EXTENSIONS)
+    level = compression_level(file_extension, level)
+    # zstd compresses with several threads itself
+    if file_extension == ZSTD_FILE_EXTENSION:
+        return _zstd_file_object(file, mode, level, threads, file_object=file_object)
+    if mode.startswith('w') and threads is not None and threads > 1:
+        return _parallel_compress_file_object(file, mode, level, threads)
+    # an opened compressed file is read instead of the file, it is not closed
+    if file_object is not None:
+        assert mode.startswith('r')
+        file = file_object
     if file_extension == GZIP_FILE_EXTENSION:
         import gzip
-        return gzip.open(file, mode=mode, compresslevel=9)
+        return gzip.open(file, mode=mode, compresslevel=level)
     elif file_extension == BZ2_FILE_EXTENSION:
         import bz2
-        return bz2.open(file, mode=mode, compresslevel=9)
+        return bz2.open(file, mode=mode, compresslevel=level)
     elif file_extension == LZMA_FILE_EXTENSION:
         import lzma
         if mode.startswith('w'):
-            preset = 6
+            preset = level
         else:
             preset = None
         return lzma.open(file, mode=mode, preset=preset)
+    elif file_extension == LZ4_FILE_EXTENSION:
+        import lz4.frame
+        return lz4.frame.open(file, mode=mode, compression_level=level)
     else:
-        assert file_extension not in FILE_EXTENSIONS
-        raise convert.universal.UnsupportedFileExtensionError(file, supported_file_extensions=FILE_EXTENSIONS)
+        assert False
+
+
+def copy_file_object(file_object_from, file_object_to):
+    """ Copies all remaining bytes of `file_object_from` into `file_object_to` block by block. """
+    import shutil
+    shutil.copyfileobj(file_object_from, file_object_to, RECOMPRESS_BLOCK_SIZE)
 
 
 def compress_file_extension(file):
@@ -1,10 +1,38 @@
 import argparse
+import glob
 import os
+import sys
 
+import convert.cache
+import convert.compress
+import convert.progress
+import convert.trace
 import convert.universal
 
 
+def _compression_level(string):
+    if string in convert.compress.COMPRESSION_LEVEL_PRESETS:
+        return string
+    try:
+        return int(string)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f'{string} is neither an integer nor one of the presets '
+            f'{tuple(convert.compress.COMPRESSION_LEVEL_PRESETS)}.')
+
+
+def _files(patterns):
+    files = []
+    for pattern in patterns:
+        if glob.escape(pattern) != pattern:
+            files.extend(sorted(glob.glob(pattern)))
+        else:
+            files.append(pattern)
+    return files
+
+
 def _main():
+    convert.universal._register_entry_point_modules()
     description = os.linesep.join((
         f'Convert a file into another file format.',
         f'Supported file extensions are {convert.universal.SUPPORTED_FILE_EXTENSIONS}.',
@@ -12,15 +40,79 @@ def _main():
     # parse arguments
     parser = argparse.ArgumentParser(description=description)
 
-    parser.add_argument('file', type=str,
-                        help='The file that should be converted.')
+    parser.add_argument('files', type=str, nargs='+', metavar='file',
+                        help=('The files that should be converted. Glob patterns are expanded. '
+                              'Several files are converted in parallel.'))
     parser.add_argument('file_extension', type=str, choices=convert.universal.SUPPORTED_FILE_EXTENSIONS,
                         help='The new file extension to which the file should be converted.')
+    parser.add_argument('--compression-level', type=_compression_level, default=None,
+                        help=(f'The compression level of the converted file. Either an integer or '
+                              f'one of the presets {tuple(convert.compress.COMPRESSION_LEVEL_PRESETS)}.'))
+    parser.add_argument('--compression-threads', type=int, default=None,
+                        help='The number of threads used to compress the converted file.')
+    parser.add_argument('--uncompressed', action='store_true',
+                        help=('Store the arrays of .npz files uncompressed and aligned for '
+                              'memory-mapping.'))
+    parser.add_argument('--cache', type=str, default=None, metavar='DIRECTORY',
+                        help=('Directory of a cache of converted files. Files which were already '
+                              'converted with the same options are taken from the cache.'))
+    parser.add_argument('--cache-size', type=int, default=None,
+                        help=(f'Maximal size of the cache in bytes. '
+                              f'Default: {convert.cache.DEFAULT_MAX_SIZE}.'))
+    parser.add_argument('--cache-hardlink', action='store_true',
+                        help='Hard link the cached files instead of copying them.')
+    parser.add_argument('--fsync', action='store_true',
+                        help='Flush the converted files to the storage device.')
+    parser.add_argument('--workers', type=int, default=None,
+                        help=('The number of processes used to convert several files. '
+                              'Default: the number of processors.'))
+    parser.add_argument('--progress', action='store_true',
+                        help=('Print the progress, the throughput and the estimated remaining '
+                              'time of the conversion.'))
+    parser.add_argument('--profile', action='store_true',
+                        help=('Print the wall time of each stage and the number of read and '
+                              'written bytes of each conversion. Several files are converted in '
+                              'the current process.'))
 
     args = parser.parse_args()
 
     # convert
-    convert.universal.convert_file_extension(args.file, args.file_extension)
+    kwargs = {'compression_level': args.compression_level,
+              'compression_threads': args.compression_threads,
+              'fsync': args.fsync,
+              'compressed': not args.uncompressed}
+    if args.progress:
+        kwargs['progress'] = convert.progress.ProgressBar()
+    if args.cache is not None:
+        kwargs['cache'] = convert.cache.ConversionCache(
+            args.cache, max_size=args.cache_size, hardlink=args.cache_hardlink)
+    files = _files(args.files)
+    if args.profile:
+        with convert.trace.Profile() as profile:
+            _convert(files, args.file_extension, 1, kwargs)
+        print(profile.summary(), file=sys.stderr)
+    else:
+        _convert(files, args.file_extension, args.workers, kwargs)
+
+
+def _convert(files, file_extension, workers, kwargs):
+    if len(files) == 1:
+        convert.universal.convert_file_extension(files[0], file_extension, **kwargs)
+    else:
+        pairs = []
+        failed = []
+        for file in files:
+            try:
+                pairs.append((file, convert.universal._replace_file_extension(file, file_extension)))
+            except convert.universal.UnsupportedFileExtensionError as error:
+                failed.append((file, None, error))
+        summary = convert.universal.convert_many(pairs, workers=workers, **kwargs)
+        failed.extend(summary.failed)
+        for file_from, file_to, error in failed:
+            print(f'Conversion of {file_from} failed: {error}', file=sys.stderr)
+        print(f'{len(summary.converted)} files converted, {len(failed)} conversions failed.')
+        if len(failed) > 0:
+            sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -1,10 +1,19 @@
-import numpy as np
+import collections.abc
+import contextlib
+import io
+import os
+import re
+import warnings
+import zipfile
 
 import convert.compress
+import convert.universal
 
 
 # *** constants *** #
 
+REQUIRED_PACKAGES = ('numpy',)
+
 NUMPY_FILE_EXTENSION = '.npy'
 NUMPY_COMPRESSED_FILE_EXTENSION = '.npz'
 TXT_FILE_EXTENSION = '.txt'
@@ -22,46 +31,544 @@ COMPRESSED_FILE_EXTENSIONS = tuple(
 
 FILE_EXTENSIONS = NATIVE_FILE_EXTENSIONS + COMPRESSED_FILE_EXTENSIONS
 
+CHUNKED_LOAD_FILE_EXTENSIONS = (NUMPY_FILE_EXTENSION,
+                                NUMPY_COMPRESSED_FILE_EXTENSION)
+CHUNKED_SAVE_FILE_EXTENSIONS = NATIVE_FILE_EXTENSIONS
+
+COPY_FILE_EXTENSION_COMBINATIONS = ((NUMPY_FILE_EXTENSION, NUMPY_COMPRESSED_FILE_EXTENSION),
+                                    (NUMPY_COMPRESSED_FILE_EXTENSION, NUMPY_FILE_EXTENSION))
+COPY_BLOCK_SIZE = 2**22
+
+UNCOMPRESSED_SAVE_FILE_EXTENSIONS = (NUMPY_COMPRESSED_FILE_EXTENSION,)
+NPZ_ALIGNMENT = 64
+NPZ_ALIGNMENT_EXTRA_FIELD_ID = 0xD935
+
+DEFAULT_CHUNK_SIZE = 2**26
+
+TXT_FORMAT = '%.18e'
+TXT_COMPLEX_FORMAT = f' ({TXT_FORMAT}+{TXT_FORMAT}j)'
+TXT_DELIMITER = ' '
+TXT_NEWLINE = '\n'
+TXT_CHUNK_VALUES = 2**16
+TXT_BLOCK_SIZE = 2**22
+TXT_COMMENT = b'#'
+
 
 # *** load and save functions *** #
 
-def load(file_object, file_extension):
+def load(file_object, file_extension, mmap=False):
+    import numpy as np
     # txt file
     if file_extension == TXT_FILE_EXTENSION:
-        try:
-            return np.loadtxt(file_object, dtype=np.float)
-        except ValueError:
-            file_object.seek(0)
-            return np.loadtxt(file_object, dtype=np.complex)
+        return _loadtxt(file_object)
     # npy file
     elif file_extension == NUMPY_FILE_EXTENSION:
+        if mmap and np.lib.format.isfileobj(file_object):
+            return _memmap_npy(file_object)
         return np.load(file_object, allow_pickle=False)
     # npz file
     elif file_extension == NUMPY_COMPRESSED_FILE_EXTENSION:
+        if mmap and np.lib.format.isfileobj(file_object):
+            array = _memmap_npz(file_object)
+            if array is not None:
+                return array
+            file_object.seek(0)
         with np.load(file_object, allow_pickle=False) as npz_file:
-            if len(npz_file) != 1:
-                raise ValueError(f'Only files with a single array can be loaded. Instead '
-                                 f'{len(npz_file)} arrays are stored in the file.')
-            return next(iter(npz_file.values()))
+            if len(npz_file) == 1:
+                return next(iter(npz_file.values()))
+            file = getattr(file_object, 'name', None)
+            if not isinstance(file, (str, bytes, os.PathLike)):
+                # the file object is closed after loading, so the compressed bytes are kept instead
+                file_object.seek(0)
+                file = io.BytesIO(file_object.read())
+        # arrays are decompressed on first access and the file is opened again for this purpose
+        return np.load(file, allow_pickle=False)
     # unknown file
     else:
         assert False
 
 
-def save(file_object, file_extension, value):
+def _memmap_npy(file_object):
+    shape, fortran_order, dtype = _read_npy_header(file_object)
+    return _memmap(file_object, dtype, file_object.tell(), shape, fortran_order=fortran_order)
+
+
+def _memmap_npz(file_object):
+    """ Returns the single array of an npz file memory-mapped if it is uncompressed and
+    otherwise None. """
+    with zipfile.ZipFile(file_object) as zip_file:
+        names = zip_file.namelist()
+        if len(names) != 1:
+            return None
+        return _memmap_npz_member(zip_file, file_object, names[0])
+
+
+def save(file_object, file_extension, value, compressed=True):
+    import numpy as np
+    # several arrays in npz file
+    if file_extension == NUMPY_COMPRESSED_FILE_EXTENSION and isinstance(value, collections.abc.Mapping):
+        _savez(file_object, value, compressed=compressed)
+        return
     array = np.asanyarray(value)
     # txt file
     if file_extension == TXT_FILE_EXTENSION:
         if array.ndim not in (1, 2):
             raise ValueError(f'Only 1D or 2D array can be saved as {TXT_FILE_EXTENSION} file. '
                              f'Got {array.ndim}D array instead.')
-        np.savetxt(file_object, array)
+        _savetxt(file_object, array)
     # npy file
     elif file_extension == NUMPY_FILE_EXTENSION:
         np.save(file_object, array, allow_pickle=False)
     # npz file
     elif file_extension == NUMPY_COMPRESSED_FILE_EXTENSION:
-        np.savez_compressed(file_object, array)
+        if compressed:
+            np.savez_compressed(file_object, array)
+        else:
+            _savez(file_object, {'arr_0': array}, compressed=False)
     # unknown file
     else:
         assert False
+
+
+def _savez(file_object, arrays, compressed=True):
+    import numpy as np
+    with zipfile.ZipFile(file_object, mode='w', compression=zipfile.ZIP_DEFLATED,
+                         allowZip64=True) as zip_file:
+        for name, array in arrays.items():
+            with _open_npz_write_member_of(zip_file, f'{name}{NUMPY_FILE_EXTENSION}',
+                                           compressed=compressed) as member:
+                np.lib.format.write_array(member, np.asanyarray(array), allow_pickle=False)
+
+
+# *** txt functions *** #
+
+def _parse_txt_block(block, column_number):
+    import numpy as np
+    values = block
+    if TXT_COMMENT in values:
+        values = re.sub(re.escape(TXT_COMMENT) + rb'[^\n]*', b'', values)
+    dtype = np.complex128 if b'j' in values else np.float64
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='loadtxt: input contained no data')
+        array = np.loadtxt(io.BytesIO(block), dtype=dtype, ndmin=2, encoding='latin1')
+    if array.size == 0:
+        return None, column_number
+    if column_number is None:
+        column_number = array.shape[1]
+    elif array.shape[1] != column_number:
+        raise ValueError(f'Each line must have {column_number} columns but lines with '
+                         f'{array.shape[1]} columns are included.')
+    return array, column_number
+
+
+def _loadtxt(file_object):
+    """ Reads the same arrays as `np.loadtxt` with its default arguments but as complex array if
+    complex values are included. The file is read block by block in a single pass and each block
+    is parsed as real or complex values depending on its content. Real values are read as fast
+    as by `np.loadtxt`, but complex values after real values are not parsed twice. Before NumPy
+    1.23, `np.loadtxt` parses line by line in Python, so the file is parsed as one block. """
+    import numpy as np
+    numpy_version = tuple(int(part) for part in np.__version__.split('.')[:2])
+    block_size = TXT_BLOCK_SIZE if numpy_version >= (1, 23) else -1
+    arrays = []
+    column_number = None
+    remainder = b''
+    while True:
+        data = file_object.read(block_size)
+        block = remainder + data
+        if len(data) > 0:
+            end = block.rfind(b'\n') + 1
+            block, remainder = block[:end], block[end:]
+        if len(block) > 0:
+            array, column_number = _parse_txt_block(block, column_number)
+            if array is not None:
+                arrays.append(array)
+        if len(data) == 0:
+            break
+    if len(arrays) == 0:
+        return np.empty(0)
+    return np.concatenate(arrays).squeeze()
+
+
+def _savetxt(file_object, array):
+    """ Writes the same text as `np.savetxt` with its default arguments but formats whole blocks
+    of rows with one string formatting operation instead of one per row. This is only about 1.5
+    times faster than `np.savetxt` since most of the time is spent formatting the single values,
+    which holds the GIL. """
+    import numpy as np
+    array = np.asarray(array)
+    if array.ndim == 1:
+        array = array.reshape(-1, 1)
+    row_number, column_number = array.shape
+    if column_number == 0:
+        file_object.write(TXT_NEWLINE.encode('latin1') * row_number)
+        return
+    is_complex = np.iscomplexobj(array)
+    if is_complex:
+        row_format = TXT_DELIMITER.join((TXT_COMPLEX_FORMAT,) * column_number) + TXT_NEWLINE
+    else:
+        row_format = TXT_DELIMITER.join((TXT_FORMAT,) * column_number) + TXT_NEWLINE
+    chunk_length = max(1, TXT_CHUNK_VALUES // column_number)
+    for start in range(0, row_number, chunk_length):
+        chunk = array[start:start + chunk_length]
+        if is_complex:
+            chunk = np.stack((chunk.real, chunk.imag), axis=-1)
+        text = (row_format * len(chunk)) % tuple(chunk.ravel().tolist())
+        if is_complex:
+            text = text.replace('+-', '-')
+        file_object.write(text.encode('latin1'))
+
+
+# *** chunked load and save functions *** #
+
+def _read_npy_header(file_object):
+    import numpy as np
+    version = np.lib.format.read_magic(file_object)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file_object)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file_object)
+    if dtype.hasobject:
+        raise ValueError('Object arrays cannot be loaded when allow_pickle=False.')
+    return shape, fortran_order, dtype
+
+
+def _write_npy_header(file_object, shape, dtype):
+    import numpy as np
+    header = {'descr': np.lib.format.dtype_to_descr(dtype),
+              'fortran_order': False,
+              'shape': tuple(shape)}
+    try:
+        np.lib.format.write_array_header_1_0(file_object, header)
+    except ValueError:
+        np.lib.format.write_array_header_2_0(file_object, header)
+
+
+def _read_array(file_object, dtype, count):
+    import numpy as np
+    size = count * dtype.itemsize
+    data = file_object.read(size)
+    if len(data) != size:
+        raise ValueError(f'The file is truncated. Expected {size} bytes but only '
+                         f'{len(data)} bytes are available.')
+    return np.frombuffer(data, dtype=dtype, count=count)
+
+
+def _write_array(file_object, array):
+    import numpy as np
+    array = np.ascontiguousarray(array)
+    file_object.write(array.reshape(-1).view(np.uint8))
+
+
+def _chunk_length(shape, dtype, chunk_size):
+    import numpy as np
+    row_size = int(np.prod(shape[1:], dtype=np.int64)) * dtype.itemsize
+    return max(1, chunk_size // max(1, row_size))
+
+
+def _read_fortran_npy_chunks(file_object, shape, dtype, chunk_size):
+    """ Yields row blocks of an array in Fortran order. The rows are not stored contiguously,
+    so each block is read column by column by seeking in the file. """
+    import numpy as np
+    offset = file_object.tell()
+    row_shape = shape[1:]
+    column_number = int(np.prod(row_shape, dtype=np.int64))
+    chunk_length = _chunk_length(shape, dtype, chunk_size)
+    for start in range(0, shape[0], chunk_length):
+        length = min(chunk_length, shape[0] - start)
+        chunk = np.empty((length, column_number), dtype=dtype, order='F')
+        for column in range(column_number):
+            file_object.seek(offset + (column * shape[0] + start) * dtype.itemsize)
+            chunk[:, column] = _read_array(file_object, dtype, length)
+        yield chunk.reshape((length,) + row_shape, order='F')
+
+
+def _read_npy_chunks(file_object, shape, fortran_order, dtype, chunk_size):
+    import numpy as np
+    fortran_order = fortran_order and len(shape) > 1
+    # row blocks of arrays in Fortran order if seeking is cheap
+    if fortran_order and np.lib.format.isfileobj(file_object):
+        yield from _read_fortran_npy_chunks(file_object, shape, dtype, chunk_size)
+    # whole array at once if rows are not stored contiguously
+    elif fortran_order or len(shape) == 0:
+        count = int(np.prod(shape, dtype=np.int64))
+        order = 'F' if fortran_order else 'C'
+        yield _read_array(file_object, dtype, count).reshape(shape, order=order)
+    # row blocks
+    else:
+        row_shape = shape[1:]
+        row_count = int(np.prod(row_shape, dtype=np.int64))
+        chunk_length = _chunk_length(shape, dtype, chunk_size)
+        for start in range(0, shape[0], chunk_length):
+            length = min(chunk_length, shape[0] - start)
+            yield _read_array(file_object, dtype, length * row_count).reshape((length,) + row_shape)
+
+
+def _open_npz_member(file_object):
+    zip_file = zipfile.ZipFile(file_object)
+    names = zip_file.namelist()
+    if len(names) != 1:
+        zip_file.close()
+        raise ValueError(f'Only files with a single array can be loaded. Instead '
+                         f'{len(names)} arrays are stored in the file.')
+    return zip_file, zip_file.open(names[0])
+
+
+def _read_npz_chunks(zip_file, member, shape, fortran_order, dtype, chunk_size):
+    try:
+        yield from _read_npy_chunks(member, shape, fortran_order, dtype, chunk_size)
+    finally:
+        member.close()
+        zip_file.close()
+
+
+def _open_npz_write_member_of(zip_file, name, compressed=True):
+    """ Opens the member `name` of `zip_file` for writing. Uncompressed members are padded by an
+    extra field so that their data starts at a multiple of `NPZ_ALIGNMENT` in the file. Since
+    the array in a `.npy` member starts at a multiple of this alignment too, it can be
+    memory-mapped. """
+    if compressed:
+        return zip_file.open(name, mode='w', force_zip64=True)
+    import struct
+    import time
+    zip_info = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+    zip_info.compress_type = zipfile.ZIP_STORED
+    # the local header ends with the alignment extra field of at least 6 bytes and the zip64
+    # extra field of 20 bytes
+    header_end = zip_file.start_dir + zipfile.sizeFileHeader + len(name.encode('utf-8')) + 6 + 20
+    padding = -header_end % NPZ_ALIGNMENT
+    zip_info.extra = struct.pack('<3H', NPZ_ALIGNMENT_EXTRA_FIELD_ID, 2 + padding,
+                                 NPZ_ALIGNMENT) + bytes(padding)
+    return zip_file.open(zip_info, mode='w', force_zip64=True)
+
+
+@contextlib.contextmanager
+def _open_npz_write_member(file_object, compressed=True):
+    with zipfile.ZipFile(file_object, mode='w', compression=zipfile.ZIP_DEFLATED,
+                         allowZip64=True) as zip_file:
+        with _open_npz_write_member_of(zip_file, 'arr_0.npy', compressed=compressed) as member:
+            yield member
+
+
+def _npz_member_offset(file_object, zip_info):
+    """ Returns the offset of the data of an uncompressed member in the zip file. """
+    import struct
+    file_object.seek(zip_info.header_offset)
+    header = file_object.read(zipfile.sizeFileHeader)
+    if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+        raise ValueError(f'The zip file has a bad header of member {zip_info.filename}.')
+    file_name_length, extra_length = struct.unpack('<2H', header[26:30])
+    return zip_info.header_offset + zipfile.sizeFileHeader + file_name_length + extra_length
+
+
+def _memmap(file_object, dtype, offset, shape, fortran_order=False, mode='r'):
+    import numpy as np
+    order = 'F' if fortran_order else 'C'
+    if int(np.prod(shape, dtype=np.int64)) == 0:
+        return np.empty(shape, dtype=dtype, order=order)
+    return np.memmap(file_object, dtype=dtype, mode=mode, offset=offset, shape=shape, order=order)
+
+
+def _memmap_npz_member(zip_file, file_object, name, mode='r'):
+    """ Returns the array in the member `name` of the npz file memory-mapped with `mode` if the
+    member is uncompressed and otherwise None. """
+    zip_info = zip_file.getinfo(name)
+    if zip_info.compress_type != zipfile.ZIP_STORED:
+        return None
+    with zip_file.open(zip_info) as member:
+        shape, fortran_order, dtype = _read_npy_header(member)
+        offset = _npz_member_offset(file_object, zip_info) + member.tell()
+    return _memmap(file_object, dtype, offset, shape, fortran_order=fortran_order, mode=mode)
+
+
+def _read_npz_member_range(zip_file, file_object, name, start, stop, mmap=False, mode='r'):
+    """ Returns the elements `start` to `stop` of the one dimensional array in the member `name`
+    of the npz file. Only uncompressed members are read from the offset of `start` on or are
+    memory-mapped with `mode` if `mmap` is true, compressed members are decompressed up to
+    `stop`. """
+    zip_info = zip_file.getinfo(name)
+    with zip_file.open(zip_info) as member:
+        shape, fortran_order, dtype = _read_npy_header(member)
+        if len(shape) != 1 or not 0 <= start <= stop <= shape[0]:
+            raise ValueError(f'The member {name} has shape {shape} which does not contain the '
+                             f'elements {start} to {stop}.')
+        offset = member.tell() + start * dtype.itemsize
+        if zip_info.compress_type == zipfile.ZIP_STORED:
+            offset += _npz_member_offset(file_object, zip_info)
+            if mmap:
+                return _memmap(file_object, dtype, offset, (stop - start,), mode=mode)
+            file_object.seek(offset)
+            return _read_array(file_object, dtype, stop - start)
+        member.seek(offset)
+        return _read_array(member, dtype, stop - start)
+
+
+def load_chunks(file_object, file_extension, chunk_size=None):
+    """ Returns the shape, the data type and an iterator over row blocks of the stored array.
+    Arrays in Fortran order are only read in row blocks from uncompressed `.npy` files. From
+    other files, they are read at once since their rows are not stored contiguously. """
+    if chunk_size is None:
+        chunk_size = DEFAULT_CHUNK_SIZE
+    # npy file
+    if file_extension == NUMPY_FILE_EXTENSION:
+        shape, fortran_order, dtype = _read_npy_header(file_object)
+        chunks = _read_npy_chunks(file_object, shape, fortran_order, dtype, chunk_size)
+    # npz file
+    elif file_extension == NUMPY_COMPRESSED_FILE_EXTENSION:
+        zip_file, member = _open_npz_member(file_object)
+        shape, fortran_order, dtype = _read_npy_header(member)
+        chunks = _read_npz_chunks(zip_file, member, shape, fortran_order, dtype, chunk_size)
+    # other files are loaded at once
+    else:
+        array = load(file_object, file_extension)
+        shape, dtype, chunks = array.shape, array.dtype, iter((array,))
+    return shape, dtype, chunks
+
+
+def save_chunks(file_object, file_extension, shape, dtype, chunks, compressed=True):
+    """ Saves an array with `shape` and `dtype` given as iterator over row blocks. """
+    import numpy as np
+    dtype = np.dtype(dtype)
+    # txt file
+    if file_extension == TXT_FILE_EXTENSION:
+        if len(shape) not in (1, 2):
+            raise ValueError(f'Only 1D or 2D array can be saved as {TXT_FILE_EXTENSION} file. '
+                             f'Got {len(shape)}D array instead.')
+        for chunk in chunks:
+            _savetxt(file_object, chunk)
+    # npy file
+    elif file_extension == NUMPY_FILE_EXTENSION:
+        _write_npy_header(file_object, shape, dtype)
+        for chunk in chunks:
+            _write_array(file_object, chunk)
+    # npz file
+    elif file_extension == NUMPY_COMPRESSED_FILE_EXTENSION:
+        with _open_npz_write_member(file_object, compressed=compressed) as member:
+            _write_npy_header(member, shape, dtype)
+            for chunk in chunks:
+                _write_array(member, chunk)
+    # unknown file
+    else:
+        assert False
+
+
+# *** copy functions *** #
+
+def _read_npy_header_bytes(file_object):
+    import numpy as np
+    prefix = file_object.read(np.lib.format.MAGIC_LEN)
+    if len(prefix) != np.lib.format.MAGIC_LEN or not prefix.startswith(np.lib.format.MAGIC_PREFIX):
+        raise ValueError('The file is not a valid .npy file.')
+    length_bytes = file_object.read(2 if prefix[-2] == 1 else 4)
+    header_length = int.from_bytes(length_bytes, byteorder='little')
+    header_bytes = prefix + length_bytes + file_object.read(header_length)
+    shape, fortran_order, dtype = _read_npy_header(io.BytesIO(header_bytes))
+    return header_bytes, shape, dtype
+
+
+def _copy_npy(file_object_from, file_object_to):
+    import numpy as np
+    header_bytes, shape, dtype = _read_npy_header_bytes(file_object_from)
+    file_object_to.write(header_bytes)
+    size = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+    while size > 0:
+        data = file_object_from.read(min(size, COPY_BLOCK_SIZE))
+        if len(data) == 0:
+            raise ValueError(f'The file is truncated. {size} bytes of the array are missing.')
+        file_object_to.write(data)
+        size -= len(data)
+
+
+def copy_file_object(file_object_from, file_extension_from, file_object_to, file_extension_to):
+    """ Copies the raw bytes of the array in a `.npy` file or a `.npz` file with a single array
+    into a `.npy` or `.npz` file without building the array. """
+    if file_extension_from == NUMPY_COMPRESSED_FILE_EXTENSION:
+        zip_file, member = _open_npz_member(file_object_from)
+        with zip_file, member:
+            copy_file_object(member, NUMPY_FILE_EXTENSION, file_object_to, file_extension_to)
+    elif file_extension_to == NUMPY_COMPRESSED_FILE_EXTENSION:
+        with _open_npz_write_member(file_object_to) as member:
+            copy_file_object(file_object_from, file_extension_from, member, NUMPY_FILE_EXTENSION)
+    else:
+        assert file_extension_from == NUMPY_FILE_EXTENSION
+        assert file_extension_to == NUMPY_FILE_EXTENSION
+        _copy_npy(file_object_from, file_object_to)
+
+
+# *** directory functions *** #
+
+def _member_file(directory, name):
+    file_name = os.path.basename(name)
+    if file_name != name or not file_name.endswith(NUMPY_FILE_EXTENSION) or file_name.startswith('.'):
+        raise ValueError(f'The array name {name} can not be used as file name.')
+    return os.path.join(directory, file_name)
+
+
+def npz_to_directory(file, directory, workers=None):
+    """
+    Saves each array of a `.npz` file in a separate `.npy` file in a directory.
+
+    The arrays are decompressed in parallel threads and copied block by block, so that the arrays
+    are never completely held in memory.
+
+    Parameters
+    ----------
+    file : str or pathlib.Path
+        The `.npz` file.
+    directory : str or pathlib.Path
+        The directory where the `.npy` files are saved. It is created if it does not exist.
+        Each file is named as the array in `file`.
+    workers : int, optional
+        The number of threads. Default: the number of processors of the machine.
+
+    Returns
+    -------
+    list of str
+        The saved `.npy` files.
+    """
+
+    import concurrent.futures
+    os.makedirs(directory, exist_ok=True)
+    with zipfile.ZipFile(file) as zip_file:
+        names = zip_file.namelist()
+        files = [_member_file(directory, name) for name in names]
+
+        def extract(name, member_file):
+            with convert.universal._atomic_file(member_file) as tmp_member_file:
+                with zip_file.open(name) as member, open(tmp_member_file, mode='wb') as file_object:
+                    _copy_npy(member, file_object)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(extract, name, member_file)
+                           for name, member_file in zip(names, files)]:
+                future.result()
+    return files
+
+
+def directory_to_npz(directory, file, compressed=True):
+    """
+    Saves all `.npy` files in a directory as arrays in one `.npz` file.
+
+    Each array is named as its file without file extension. The arrays are copied block by block
+    into the `.npz` file, so that they are never completely held in memory.
+
+    Parameters
+    ----------
+    directory : str or pathlib.Path
+        The directory with the `.npy` files.
+    file : str or pathlib.Path
+        The `.npz` file.
+    compressed : bool, optional
+        If false, the arrays are stored uncompressed and aligned so that they can be
+        memory-mapped (see :func:`convert.save`). Default: true.
+    """
+
+    file_names = sorted(file_name for file_name in os.listdir(directory)
+                        if file_name.endswith(NUMPY_FILE_EXTENSION))
+    with convert.universal._atomic_file(file) as tmp_file, zipfile.ZipFile(
+            tmp_file, mode='w', compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zip_file:
+        for file_name in file_names:
+            with open(os.path.join(directory, file_name), mode='rb') as file_object:
+                with _open_npz_write_member_of(zip_file, file_name,
+                                               compressed=compressed) as member:
+                    _copy_npy(file_object, member)
@@ -0,0 +1,171 @@
+import contextlib
+import os
+import sys
+import threading
+import time
+
+
+# *** progress display *** #
+
+def _format_seconds(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours}:{minutes:02d}:{seconds:02d}'
+
+
+class ProgressBar:
+    """
+    A progress callback which prints the progress, the throughput and the estimated remaining
+    time of a conversion.
+
+    Parameters
+    ----------
+    file : io.TextIOBase, optional
+        The text file to which the progress is printed. Default: ``sys.stderr``.
+    interval : float, optional
+        The minimal number of seconds between two printed lines. Default: 0.5 seconds.
+    """
+
+    def __init__(self, file=None, interval=0.5):
+        self.file = file
+        self.interval = interval
+        self._start = None
+        self._last = None
+        self._bytes_read = None
+
+    def __call__(self, bytes_read, bytes_total):
+        now = time.perf_counter()
+        if self._start is None:
+            self._start = now
+        elif bytes_read == self._bytes_read or (
+                bytes_read < bytes_total and now - self._last < self.interval):
+            return
+        self._last = now
+        self._bytes_read = bytes_read
+        seconds = now - self._start
+        text = f'{bytes_read / 10**6:.1f} / {bytes_total / 10**6:.1f} MB'
+        if bytes_total > 0:
+            text = f'{100 * bytes_read / bytes_total:5.1f} % ({text})'
+        if seconds > 0 and bytes_read > 0:
+            speed = bytes_read / seconds
+            text += f', {speed / 10**6:.1f} MB/s'
+            if bytes_read < bytes_total:
+                text += f', ETA {_format_seconds((bytes_total - bytes_read) / speed)}'
+        file = sys.stderr if self.file is None else self.file
+        end = os.linesep if bytes_read >= bytes_total else ''
+        print(f'\r{text:<60}', end=end, file=file, flush=True)
+
+
+# *** progress of read files *** #
+
+PROGRESS_BLOCK_SIZE = 2**20
+
+_thread_state = threading.local()
+
+
+def current_progress():
+    """ Returns the file and the progress callback of the conversion in the current thread or None. """
+    return getattr(_thread_state, 'progress', None)
+
+
+class _ProgressFile:
+    """ A file object which reports the read position of the underlying file on disk. """
+
+    def __init__(self, file_object, file_descriptor, size, callback, raw_file_object=None):
+        self._file_object = file_object
+        self._file_descriptor = file_descriptor
+        self._size = size
+        self._callback = callback
+        self._raw_file_object = raw_file_object
+        self._unreported = 0
+
+    def __getattr__(self, name):
+        return getattr(self._file_object, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def _report(self, size):
+        # query the position only once per block to keep reads of small pieces cheap
+        self._unreported += size
+        if self._unreported >= PROGRESS_BLOCK_SIZE:
+            self._unreported = 0
+            position = os.lseek(self._file_descriptor, 0, os.SEEK_CUR)
+            self._callback(min(position, self._size), self._size)
+
+    def read(self, *args):
+        data = self._file_object.read(*args)
+        self._report(len(data))
+        return data
+
+    def read1(self, *args):
+        data = self._file_object.read1(*args)
+        self._report(len(data))
+        return data
+
+    def readline(self, *args):
+        data = self._file_object.readline(*args)
+        self._report(len(data))
+        return data
+
+    def readinto(self, buffer):
+        size = self._file_object.readinto(buffer)
+        self._report(size)
+        return size
+
+    def close(self):
+        try:
+            self._file_object.close()
+        finally:
+            if self._raw_file_object is not None:
+                self._raw_file_object.close()
+
+
+def open_file(open_function, file, compressed):
+    """ Opens `file` for reading by `open_function` and reports the read position of the file on
+    disk to the progress callback of the current thread. Compressed files are opened by passing
+    the file object of the compressed file to `open_function`. """
+    _, callback = current_progress()
+    if compressed:
+        raw_file_object = open(file, mode='rb')
+        try:
+            file_object = open_function(raw_file_object)
+        except BaseException:
+            raw_file_object.close()
+            raise
+        file_descriptor = raw_file_object.fileno()
+    else:
+        raw_file_object = None
+        file_object = open_function()
+        file_descriptor = file_object.fileno()
+    size = os.fstat(file_descriptor).st_size
+    return _ProgressFile(file_object, file_descriptor, size, callback,
+                         raw_file_object=raw_file_object)
+
+
+@contextlib.contextmanager
+def report(file, callback):
+    """ Reports the progress of reading `file` in the current thread to `callback` if it is not
+    None. """
+    if callback is None:
+        yield
+        return
+    _thread_state.progress = (os.path.abspath(file), callback)
+    try:
+        yield
+    finally:
+        _thread_state.progress = None
+    size = os.path.getsize(file)
+    callback(size, size)
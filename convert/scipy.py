@@ -1,11 +1,18 @@
-import scipy.sparse
-import scipy.io
+import collections
+import itertools
+import os
+import re
+import warnings
+import zipfile
 
 import convert.compress
+import convert.numpy
 
 
 # *** constants *** #
 
+REQUIRED_PACKAGES = ('numpy', 'scipy')
+
 MATRIX_FORMATS = ('csc', 'csr', 'bsr', 'dia', 'coo')
 NPZ_FILE_EXTENSIONS = tuple(f'.{matrix_format}.npz' for matrix_format in MATRIX_FORMATS)
 MATRIX_MARKET_FILE_EXTENSION = '.mtx'
@@ -25,16 +32,38 @@ COMPRESSED_FILE_EXTENSIONS = tuple(
 
 FILE_EXTENSIONS = NATIVE_FILE_EXTENSIONS + COMPRESSED_FILE_EXTENSIONS
 
+UNCOMPRESSED_SAVE_FILE_EXTENSIONS = NPZ_FILE_EXTENSIONS
+
+# SciPy sorts indices and sums duplicates in place, so arrays are mapped copy-on-write
+NPZ_MMAP_MODE = 'c'
+
+ROW_SLICE_FILE_EXTENSIONS = ('.csr.npz',)
+COLUMN_SLICE_FILE_EXTENSIONS = ('.csc.npz',)
+
+MATRIX_MARKET_BLOCK_SIZE = 2**24
+MATRIX_MARKET_CHUNK_ENTRIES = 2**16
+MATRIX_MARKET_THREADS = os.cpu_count()
+
 
 # *** load and save functions *** #
 
-def load(file_object, file_extension):
+def load(file_object, file_extension, mmap=False, rows=None, columns=None):
+    import numpy as np
+    import scipy.io
+    import scipy.sparse
+    # memory-mapping needs a real file
+    mmap = mmap and file_extension in NPZ_FILE_EXTENSIONS and np.lib.format.isfileobj(file_object)
+    # slice of npz file
+    if rows is not None or columns is not None:
+        return _load_npz_slice(file_object, file_extension, rows=rows, columns=columns, mmap=mmap)
     # npz file
     if file_extension in NPZ_FILE_EXTENSIONS:
+        if mmap:
+            return _memmap_npz(file_object)
         return scipy.sparse.load_npz(file_object)
     # matrix market file
     elif file_extension == MATRIX_MARKET_FILE_EXTENSION:
-        return scipy.io.mmread(file_object)
+        return _mmread(file_object)
     # harwell boing file
     elif file_extension == HARWELL_BOEING_FILE_EXTENSION:
         return scipy.io.hb_read(file_object)
@@ -43,13 +72,21 @@ def load(file_object, file_extension):
         assert False
 
 
-def save(file_object, file_extension, value):
+def save(file_object, file_extension, value, compressed=True):
+    import scipy.io
+    import scipy.sparse
     # npz file
     if file_extension in NPZ_FILE_EXTENSIONS:
-        scipy.sparse.save_npz(file_object, value)
+        if compressed:
+            scipy.sparse.save_npz(file_object, value)
+        else:
+            convert.numpy._savez(file_object, _npz_arrays(value), compressed=False)
     # matrix market file
     elif file_extension == MATRIX_MARKET_FILE_EXTENSION:
-        scipy.io.mmwrite(file_object, value)
+        if scipy.sparse.issparse(value):
+            _mmwrite(file_object, value)
+        else:
+            scipy.io.mmwrite(file_object, value)
     # harwell boing file
     elif file_extension == HARWELL_BOEING_FILE_EXTENSION:
         value = value.tocsc(copy=False)  # format which are not csc is not supported in scipy.io.hb_write for SciPy version <= 1.1
@@ -57,3 +94,405 @@ def save(file_object, file_extension, value):
     # unknown file
     else:
         assert False
+
+
+# *** npz functions *** #
+
+NPZ_INDEX_ARRAY_NAMES = {'csc': ('indices', 'indptr'),
+                         'csr': ('indices', 'indptr'),
+                         'bsr': ('indices', 'indptr'),
+                         'dia': ('offsets',),
+                         'coo': ('row', 'col')}
+
+
+def _npz_arrays(matrix):
+    """ Returns the arrays stored by `scipy.sparse.save_npz` for `matrix`. """
+    if matrix.format not in NPZ_INDEX_ARRAY_NAMES:
+        raise NotImplementedError(f'Save is not implemented for sparse matrix of format '
+                                  f'{matrix.format}.')
+    arrays = {name: getattr(matrix, name) for name in NPZ_INDEX_ARRAY_NAMES[matrix.format]}
+    arrays.update(format=matrix.format.encode('ascii'), shape=matrix.shape, data=matrix.data)
+    return arrays
+
+
+def _read_npz_array(zip_file, name):
+    import numpy as np
+    with zip_file.open(name) as member:
+        return np.lib.format.read_array(member, allow_pickle=False)
+
+
+def _read_npz_format_and_shape(zip_file):
+    matrix_format = _read_npz_array(zip_file, 'format.npy').item()
+    if isinstance(matrix_format, bytes):
+        matrix_format = matrix_format.decode('ascii')
+    if matrix_format not in NPZ_INDEX_ARRAY_NAMES:
+        raise ValueError(f'The file contains a matrix of unknown format {matrix_format}.')
+    shape = tuple(int(length) for length in _read_npz_array(zip_file, 'shape.npy'))
+    return matrix_format, shape
+
+
+def _memmap_npz(file_object):
+    """ Loads a sparse matrix whose arrays are memory-mapped if they are stored uncompressed.
+    Only the lengths of the arrays of csr, csc and bsr matrices are checked, so that the time is
+    independent of their size. """
+    import scipy.sparse
+    with zipfile.ZipFile(file_object) as zip_file:
+        matrix_format, shape = _read_npz_format_and_shape(zip_file)
+        arrays = {}
+        for name in NPZ_INDEX_ARRAY_NAMES[matrix_format] + ('data',):
+            member_name = f'{name}{convert.numpy.NUMPY_FILE_EXTENSION}'
+            array = convert.numpy._memmap_npz_member(zip_file, file_object, member_name,
+                                                     mode=NPZ_MMAP_MODE)
+            if array is None:
+                array = _read_npz_array(zip_file, member_name)
+            arrays[name] = array
+
+    # the arrays are passed to the constructors without copying them
+    matrix_class = getattr(scipy.sparse, f'{matrix_format}_matrix')
+    if matrix_format == 'coo':
+        arrays = (arrays['data'], (arrays['row'], arrays['col']))
+    elif matrix_format == 'dia':
+        arrays = (arrays['data'], arrays['offsets'])
+    else:
+        arrays = (arrays['data'], arrays['indices'], arrays['indptr'])
+    return matrix_class(arrays, shape=shape, copy=False)
+
+
+def _load_npz_slice(file_object, file_extension, rows=None, columns=None, mmap=False):
+    """ Loads the rows of a csr matrix or the columns of a csc matrix selected by a slice. Only
+    the pointers of the selected rows or columns and their indices and data are read or
+    memory-mapped. """
+    import numpy as np
+    import scipy.sparse
+    if file_extension in ROW_SLICE_FILE_EXTENSIONS and columns is None:
+        matrix_format, index = 'csr', rows
+    elif file_extension in COLUMN_SLICE_FILE_EXTENSIONS and rows is None:
+        matrix_format, index = 'csc', columns
+    else:
+        raise ValueError(f'Only rows of {ROW_SLICE_FILE_EXTENSIONS} files and columns of '
+                         f'{COLUMN_SLICE_FILE_EXTENSIONS} files can be loaded separately.')
+    if not isinstance(index, slice):
+        raise TypeError(f'Rows and columns have to be selected by a slice. Got {index!r}.')
+
+    with zipfile.ZipFile(file_object) as zip_file:
+        stored_format, shape = _read_npz_format_and_shape(zip_file)
+        if stored_format != matrix_format:
+            raise ValueError(f'The file contains a {stored_format} matrix instead of a '
+                             f'{matrix_format} matrix.')
+        if matrix_format == 'csr':
+            major_length, minor_length = shape
+        else:
+            minor_length, major_length = shape
+
+        # contiguous range of rows or columns containing the slice
+        selected = range(major_length)[index]
+        if len(selected) > 0:
+            # the first and last selected rows or columns are swapped by a negative step
+            if selected.step > 0:
+                start, stop = selected[0], selected[-1] + 1
+            else:
+                start, stop = selected[-1], selected[0] + 1
+        else:
+            start = stop = 0
+        indptr = convert.numpy._read_npz_member_range(
+            zip_file, file_object, 'indptr.npy', start, stop + 1)
+        # Python integers avoid overflows of small index dtypes with NumPy 2 promotion rules
+        first, last = int(indptr[0]), int(indptr[-1])
+        indices = convert.numpy._read_npz_member_range(
+            zip_file, file_object, 'indices.npy', first, last, mmap=mmap,
+            mode=NPZ_MMAP_MODE)
+        data = convert.numpy._read_npz_member_range(
+            zip_file, file_object, 'data.npy', first, last, mmap=mmap,
+            mode=NPZ_MMAP_MODE)
+
+    indptr = indptr - first
+    if matrix_format == 'csr':
+        matrix = scipy.sparse.csr_matrix((data, indices, indptr), shape=(stop - start, minor_length))
+        if selected.step != 1:
+            matrix = matrix[np.asarray(selected) - start]
+    else:
+        matrix = scipy.sparse.csc_matrix((data, indices, indptr), shape=(minor_length, stop - start))
+        if selected.step != 1:
+            matrix = matrix[:, np.asarray(selected) - start]
+    return matrix
+
+
+# *** matrix market functions *** #
+
+def _mmread_header(file_object):
+    line = file_object.readline()
+    mmid, matrix, matrix_format, field, symmetry = (part.decode('latin1').strip()
+                                                    for part in line.split())
+    if not mmid.startswith('%%MatrixMarket'):
+        raise ValueError('source is not in Matrix Market format')
+    if not matrix.lower() == 'matrix':
+        raise ValueError(f'Problem reading file header: {line}')
+    # skip comments and empty lines
+    while line.startswith(b'%') or (len(line) > 0 and not line.strip()):
+        line = file_object.readline()
+    matrix_format = matrix_format.lower()
+    if matrix_format not in ('array', 'coordinate'):
+        raise NotImplementedError(matrix_format)
+    size = tuple(map(int, line.split()))
+    size_length = 2 if matrix_format == 'array' else 3
+    if len(size) != size_length:
+        raise ValueError(f'Header line not of length {size_length}: {line}')
+    return matrix_format, field.lower(), symmetry.lower(), size
+
+
+def _mmread_blocks(file_object):
+    remainder = b''
+    while True:
+        data = file_object.read(MATRIX_MARKET_BLOCK_SIZE)
+        block = remainder + data
+        if len(data) > 0:
+            end = block.rfind(b'\n') + 1
+            block, remainder = block[:end], block[end:]
+        if len(block) > 0:
+            yield block
+        if len(data) == 0:
+            break
+
+
+def _mmread_parse_block(block, dtype):
+    import numpy as np
+    if b'%' in block:
+        block = re.sub(rb'(?m)^%[^\n]*', b'', block)
+    # fromstring parses a wrong value from whitespace only
+    if block.isspace():
+        return np.empty(0, dtype=dtype)
+    # fromstring releases the GIL so blocks can be parsed in parallel
+    try:
+        return np.fromstring(block, dtype=dtype, sep=' ')
+    except DeprecationWarning as error:
+        raise ValueError(f'The Matrix Market file contains invalid values: {error}') from error
+
+
+def _mmread_values(file_object, dtype, number):
+    """ Parses `number` values of `dtype` from the rest of `file_object` in parallel threads. """
+    import concurrent.futures
+    import numpy as np
+    values = np.empty(number, dtype=dtype)
+    start = 0
+
+    def store(parsed_block):
+        nonlocal start
+        if start + len(parsed_block) > number:
+            raise ValueError("'entries' in header is smaller than number of entries")
+        values[start:start + len(parsed_block)] = parsed_block
+        start += len(parsed_block)
+
+    with warnings.catch_warnings():
+        # fromstring only warns about invalid values
+        warnings.filterwarnings('error', message='string or file could not be read to its end',
+                                category=DeprecationWarning)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MATRIX_MARKET_THREADS) as executor:
+            pending = collections.deque()
+            for block in _mmread_blocks(file_object):
+                pending.append(executor.submit(_mmread_parse_block, block, dtype))
+                while len(pending) > 2 * MATRIX_MARKET_THREADS:
+                    store(pending.popleft().result())
+            while len(pending) > 0:
+                store(pending.popleft().result())
+    if start < number:
+        raise ValueError("'entries' in header is larger than number of entries")
+    return values
+
+
+def _mmread(file_object):
+    """ Reads the same matrix as `scipy.io.mmread` but parses large blocks at once. """
+    import numpy as np
+    import scipy.sparse
+    matrix_format, field, symmetry, size = _mmread_header(file_object)
+    dtype = {'integer': np.intp, 'unsigned-integer': np.uint64, 'real': np.float64,
+             'complex': np.complex128, 'pattern': np.float64}[field]
+    parse_dtype = {'integer': np.int64, 'unsigned-integer': np.uint64,
+                   'pattern': np.int64}.get(field, np.float64)
+    value_number = 2 if field == 'complex' else 1
+    is_skew = symmetry == 'skew-symmetric'
+    is_herm = symmetry == 'hermitian'
+
+    # dense array
+    if matrix_format == 'array':
+        rows, columns = size
+        if symmetry == 'general':
+            row_indices, column_indices = np.indices((columns, rows)).reshape(2, -1)[::-1]
+        else:
+            # lower triangle in column major order
+            column_indices, row_indices = np.triu_indices(rows, k=1 if is_skew else 0, m=columns)
+        values = _mmread_values(file_object, parse_dtype, len(row_indices) * value_number)
+        if field == 'complex':
+            values = values.view(np.complex128)
+        array = np.zeros((rows, columns), dtype=dtype)
+        array[row_indices, column_indices] = values
+        if symmetry != 'general':
+            mask = row_indices != column_indices
+            if is_skew:
+                array[column_indices[mask], row_indices[mask]] = -values[mask]
+            elif is_herm:
+                array[column_indices[mask], row_indices[mask]] = values[mask].conjugate()
+            else:
+                array[column_indices[mask], row_indices[mask]] = values[mask]
+        return array
+
+    # sparse matrix
+    rows, columns, entries = size
+    if entries == 0:
+        return scipy.sparse.coo_matrix((rows, columns), dtype=dtype)
+    column_number = 2 + (0 if field == 'pattern' else value_number)
+    values = _mmread_values(file_object, parse_dtype, entries * column_number)
+    values = values.reshape(entries, column_number)
+    row_indices = values[:, 0].astype(np.intc) - 1
+    column_indices = values[:, 1].astype(np.intc) - 1
+    if field == 'pattern':
+        data = np.ones(entries, dtype=np.int8)
+    elif field == 'complex':
+        data = np.ascontiguousarray(values[:, 2:]).view(np.complex128).reshape(-1)
+    else:
+        data = values[:, 2]
+    if symmetry != 'general':
+        mask = row_indices != column_indices
+        od_row_indices = row_indices[mask]
+        od_column_indices = column_indices[mask]
+        od_data = data[mask]
+        row_indices = np.concatenate((row_indices, od_column_indices))
+        column_indices = np.concatenate((column_indices, od_row_indices))
+        if is_skew:
+            od_data *= -1
+        elif is_herm:
+            od_data = od_data.conjugate()
+        data = np.concatenate((data, od_data))
+    return scipy.sparse.coo_matrix((data, (row_indices, column_indices)), shape=(rows, columns), dtype=dtype)
+
+
+def _mmwrite_symmetry(matrix):
+    """ Returns the same symmetry as `scipy.io.mmwrite` would detect. Like `scipy.io.mmwrite`
+    this sums duplicate entries in place if `matrix` is a square coo matrix. """
+    import numpy as np
+    rows, columns = matrix.shape
+    if rows != columns:
+        return 'general'
+    coo = matrix.tocoo()
+    mask = coo.data != 0
+    if (coo.row[mask] < coo.col[mask]).sum() != (coo.row[mask] > coo.col[mask]).sum():
+        return 'general'
+    coo.sum_duplicates()
+
+    # pairs of entries of lower triangle and diagonal in the order checked by scipy
+    is_checked = coo.row >= coo.col
+    row, col, aij = coo.row[is_checked], coo.col[is_checked], coo.data[is_checked]
+    is_diagonal = row == col
+    aji = aij.copy()
+    csr = coo.tocsr()
+    aji[~is_diagonal] = np.asarray(csr[col[~is_diagonal], row[~is_diagonal]]).reshape(-1)
+
+    # the first nonzero diagonal entry is not checked if it comes before any entry of the
+    # lower triangle which is not skew symmetric
+    with np.errstate(over='ignore'):
+        is_not_skew = aij != -aji
+    is_nonzero_diagonal = is_diagonal & (aij != 0)
+    is_skew_breaking = ~is_diagonal & is_not_skew
+    is_used = np.ones(len(aij), dtype=bool)
+    if is_nonzero_diagonal.any():
+        first_diagonal = np.argmax(is_nonzero_diagonal)
+        if not is_skew_breaking[:first_diagonal].any():
+            is_used[first_diagonal] = False
+
+    if np.all(aij[is_used] == aji[is_used]):
+        return 'symmetric'
+    if not is_nonzero_diagonal.any() and not is_skew_breaking.any():
+        return 'skew-symmetric'
+    if matrix.dtype.char in 'FD' and np.all(aij[is_used] == aji[is_used].conj()):
+        return 'hermitian'
+    return 'general'
+
+
+def _mmwrite(file_object, matrix):
+    """ Writes the same text as `scipy.io.mmwrite` with its default arguments for a sparse
+    matrix but formats large chunks of entries at once. """
+    import numpy as np
+    kind = matrix.dtype.kind
+    if kind == 'i':
+        if not np.can_cast(matrix.dtype, 'intp'):
+            raise OverflowError("mmwrite does not support integer dtypes larger than native 'intp'.")
+        field = 'integer'
+        value_format = '%i'
+    elif kind == 'u':
+        field = 'unsigned-integer'
+        value_format = '%u'
+    elif kind == 'f':
+        field = 'real'
+        value_format = '%.7e' if matrix.dtype.char in 'fF' else '%.15e'
+    elif kind == 'c':
+        field = 'complex'
+        value_format = '%.7e %.7e' if matrix.dtype.char in 'fF' else '%.15e %.15e'
+    else:
+        raise TypeError(f'unexpected dtype kind {kind}')
+    symmetry = _mmwrite_symmetry(matrix)
+
+    coo = matrix.tocoo()
+    row, col, data = coo.row, coo.col, coo.data
+    if symmetry != 'general':
+        mask = row >= col
+        row, col, data = row[mask], col[mask], data[mask]
+
+    header = (f'%%MatrixMarket matrix coordinate {field} {symmetry}\n'
+              f'%\n'
+              f'{matrix.shape[0]} {matrix.shape[1]} {len(data)}\n')
+    file_object.write(header.encode('latin1'))
+    line_format = f'%i %i {value_format}\n'
+    for start in range(0, len(data), MATRIX_MARKET_CHUNK_ENTRIES):
+        stop = start + MATRIX_MARKET_CHUNK_ENTRIES
+        columns = [(row[start:stop] + 1).tolist(), (col[start:stop] + 1).tolist()]
+        if field == 'complex':
+            columns += [data[start:stop].real.tolist(), data[start:stop].imag.tolist()]
+        else:
+            columns.append(data[start:stop].tolist())
+        text = (line_format * len(columns[0])) % tuple(itertools.chain.from_iterable(zip(*columns)))
+        file_object.write(text.encode('latin1'))
+
+
+# *** chunked load and save functions *** #
+
+def _dense_chunks(matrix, chunk_size):
+    import scipy.sparse
+    is_sparse = scipy.sparse.issparse(matrix)
+    chunk_length = max(1, chunk_size // max(1, matrix.shape[1] * matrix.dtype.itemsize))
+    for start in range(0, matrix.shape[0], chunk_length):
+        chunk = matrix[start:start + chunk_length]
+        yield chunk.toarray() if is_sparse else chunk
+
+
+def load_chunks(file_object, file_extension, chunk_size=None):
+    """ Returns the shape, the data type and an iterator over dense row blocks of the stored
+    sparse matrix or dense array. Dense arrays are stored in `.mtx` files in array format. """
+    import numpy as np
+    import scipy.sparse
+    if chunk_size is None:
+        chunk_size = convert.numpy.DEFAULT_CHUNK_SIZE
+    matrix = load(file_object, file_extension)
+    if scipy.sparse.issparse(matrix):
+        matrix = matrix.tocsr(copy=False)
+    else:
+        matrix = np.asarray(matrix)
+    return matrix.shape, matrix.dtype, _dense_chunks(matrix, chunk_size)
+
+
+def save_chunks(file_object, file_extension, shape, dtype, chunks, compressed=True):
+    """ Saves a dense array with `shape` and `dtype` given as iterator over row blocks as sparse
+    matrix. A 1D array is saved as matrix with one column. """
+    import scipy.sparse
+    if len(shape) not in (1, 2):
+        raise ValueError(f'Only 1D or 2D array can be saved as sparse matrix. '
+                         f'Got {len(shape)}D array instead.')
+    column_number = shape[1] if len(shape) == 2 else 1
+    blocks = [scipy.sparse.csr_matrix(chunk.reshape(len(chunk), column_number))
+              for chunk in chunks]
+    if len(blocks) > 0:
+        matrix = scipy.sparse.vstack(blocks, format='csr', dtype=dtype)
+    else:
+        matrix = scipy.sparse.csr_matrix((0, column_number), dtype=dtype)
+    del blocks
+    if file_extension in NPZ_FILE_EXTENSIONS:
+        matrix = matrix.asformat(file_extension.split('.')[1], copy=False)
+    save(file_object, file_extension, matrix, compressed=compressed)
@@ -0,0 +1,110 @@
+import asyncio
+import concurrent.futures
+import os
+import pathlib
+import tempfile
+import threading
+import types
+
+import numpy as np
+import pytest
+
+import convert
+import convert.aio
+
+
+# *** helpers *** #
+
+def _blocking_module():
+    module = types.ModuleType('blocking_module')
+    module.FILE_EXTENSIONS = ('.blocking',)
+    module.BINARY_MODE_DICT = {'.blocking': True}
+    module.running = 0
+    module.max_running = 0
+    module.lock = threading.Lock()
+    module.started = threading.Event()
+    module.proceed = threading.Event()
+
+    def load(file_object, file_extension, **kwargs):
+        return file_object.read()
+
+    def save(file_object, file_extension, value):
+        with module.lock:
+            module.running += 1
+            module.max_running = max(module.max_running, module.running)
+        module.started.set()
+        file_object.write(value[:3])
+        module.proceed.wait(timeout=10)
+        file_object.write(value[3:])
+        with module.lock:
+            module.running -= 1
+
+    module.load = load
+    module.save = save
+    return module
+
+
+# *** tests *** #
+
+def test_load_save_convert():
+    value = np.arange(12.).reshape(3, 4)
+
+    async def run(tmp_dir):
+        file = tmp_dir / 'test_file.npy'
+        await convert.aio.save(file, value)
+        file_to = await convert.aio.convert_file(file, tmp_dir / 'test_file.txt.gz', compression_level=1)
+        other_file = await convert.aio.convert_file_extension(file_to, '.npz')
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            return await asyncio.gather(*(convert.aio.load(file, executor=executor)
+                                          for file in (file, file_to, other_file)))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for value_loaded in asyncio.run(run(pathlib.Path(tmp_dir))):
+            assert np.all(value_loaded == value)
+
+
+def test_semaphore():
+    module = _blocking_module()
+    module.proceed.set()
+
+    async def run(tmp_dir):
+        semaphore = asyncio.Semaphore(2)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+            await asyncio.gather(*(convert.aio.save(tmp_dir / f'test_file_{i}.blocking', b'value',
+                                                    executor=executor, semaphore=semaphore)
+                                   for i in range(10)))
+
+    convert.register_module(module)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            asyncio.run(run(pathlib.Path(tmp_dir)))
+            assert len(os.listdir(tmp_dir)) == 10
+        assert module.max_running <= 2
+    finally:
+        convert.unregister_module(module)
+
+
+def test_cancel_save():
+    module = _blocking_module()
+
+    async def run(file):
+        semaphore = asyncio.Semaphore(1)
+        task = asyncio.ensure_future(convert.aio.save(file, b'new value', semaphore=semaphore))
+        await asyncio.get_running_loop().run_in_executor(None, module.started.wait, 10)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        module.proceed.set()
+        # the semaphore is released when the write has returned
+        await asyncio.wait_for(semaphore.acquire(), timeout=10)
+
+    convert.register_module(module)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file = pathlib.Path(tmp_dir) / 'test_file.blocking'
+            file.write_bytes(b'old value')
+            asyncio.run(run(file))
+            assert os.listdir(tmp_dir) == [file.name]
+            assert file.read_bytes() == b'old value'
+    finally:
+        convert.unregister_module(module)
@@ -0,0 +1,163 @@
+import os
+import pathlib
+import stat
+import tempfile
+
+import numpy as np
+import pytest
+
+import convert
+import convert.cache
+import convert.universal
+
+
+# *** tests *** #
+
+@pytest.mark.parametrize('hardlink', (False, True))
+def test_convert_file_cache(hardlink, monkeypatch):
+    value = np.arange(100.).reshape(20, 5)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = pathlib.Path(tmp_dir)
+        cache = convert.cache.ConversionCache(tmp_dir / 'cache', hardlink=hardlink)
+        file = tmp_dir / 'test_file.npy'
+        convert.save(file, value)
+
+        # first conversion is stored
+        file_to = convert.convert_file_extension(file, '.txt', cache=cache)
+        assert len(os.listdir(tmp_dir / 'cache')) == 1
+
+        # second conversion is taken from the cache
+        def fail(*args, **kwargs):
+            raise AssertionError('The file was converted again.')
+
+        with monkeypatch.context() as context:
+            context.setattr(convert.universal, '_convert_file', fail)
+            other_file_to = tmp_dir / 'test_file_converted.txt'
+            convert.convert_file(file, other_file_to, cache=cache)
+            assert np.all(convert.load(other_file_to) == value)
+            assert os.path.samefile(file_to, other_file_to) == hardlink
+            # other options are not taken from the cache
+            with pytest.raises(AssertionError):
+                convert.convert_file(file, tmp_dir / 'test_file_converted.txt.gz',
+                                     compression_level=1, cache=cache)
+
+        # modified file is converted again
+        value = value + 1
+        convert.save(file, value)
+        convert.convert_file(file, other_file_to, cache=str(tmp_dir / 'cache'))
+        assert np.all(convert.load(other_file_to) == value)
+        assert len(os.listdir(tmp_dir / 'cache')) == 2
+
+
+def test_convert_file_cache_hardlink_mode():
+    value = np.arange(10.)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = pathlib.Path(tmp_dir)
+        cache = convert.cache.ConversionCache(tmp_dir / 'cache', hardlink=True)
+        file = tmp_dir / 'test_file.npy'
+        convert.save(file, value)
+        convert.convert_file_extension(file, '.txt', cache=cache)
+        entry, = (tmp_dir / 'cache').iterdir()
+        entry_mode = stat.S_IMODE(entry.stat().st_mode)
+        entry_content = entry.read_bytes()
+
+        # the mode of an existing file is kept without changing the stored file
+        other_file_to = tmp_dir / 'test_file_converted.txt'
+        other_file_to.write_text('old content')
+        other_mode = 0o600 if entry_mode != 0o600 else 0o640
+        other_file_to.chmod(other_mode)
+        convert.convert_file(file, other_file_to, cache=cache)
+        assert stat.S_IMODE(other_file_to.stat().st_mode) == other_mode
+        assert not os.path.samefile(entry, other_file_to)
+        assert np.all(convert.load(other_file_to) == value)
+        assert stat.S_IMODE(entry.stat().st_mode) == entry_mode
+        assert entry.read_bytes() == entry_content
+
+        # later saves of the converted file do not change the stored file
+        convert.save(other_file_to, value + 1)
+        assert stat.S_IMODE(entry.stat().st_mode) == entry_mode
+        assert entry.read_bytes() == entry_content
+
+        # without a different mode the stored file is hard linked
+        new_file_to = tmp_dir / 'test_file_new.txt'
+        convert.convert_file(file, new_file_to, cache=cache)
+        assert os.path.samefile(entry, new_file_to)
+
+
+def test_cache_evict():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = pathlib.Path(tmp_dir)
+        cache = convert.cache.ConversionCache(tmp_dir / 'cache', max_size=500)
+        file = tmp_dir / 'test_file'
+        for i in range(5):
+            file.write_bytes(bytes(100))
+            cache.put(f'key_{i}', file)
+            os.utime(tmp_dir / 'cache' / f'key_{i}', ns=(i * 10**9, i * 10**9))
+        assert len(os.listdir(tmp_dir / 'cache')) == 5
+        # key_2 is used again
+        assert cache.get('key_2', tmp_dir / 'other_file')
+        cache.max_size = 250
+        cache.evict()
+        assert sorted(os.listdir(tmp_dir / 'cache')) == ['key_2', 'key_4']
+        assert not cache.get('key_0', tmp_dir / 'other_file')
+
+
+def test_load_cache():
+    import scipy.sparse
+    values = {'test_file.npy': np.arange(100.).reshape(20, 5),
+              'test_file.csr.npz': scipy.sparse.random(20, 5, density=0.5, format='csr'),
+              'test_file.coo.npz': scipy.sparse.random(20, 5, density=0.5, format='coo')}
+    cache = convert.cache.LoadCache()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = pathlib.Path(tmp_dir)
+        for file_name, value in values.items():
+            file = tmp_dir / file_name
+            convert.save(file, value)
+            value_loaded = convert.load(file, cache=cache)
+            assert convert.load(str(file), cache=cache) is value_loaded
+            assert convert.load(tmp_dir / '.' / file_name, cache=cache) is value_loaded
+            assert convert.load(file) is not value_loaded
+            # cached values are read-only
+            with pytest.raises(ValueError):
+                if scipy.sparse.issparse(value_loaded):
+                    value_loaded.data[0] = 1
+                else:
+                    value_loaded[0] = 1
+            # modified files are loaded again
+            os.utime(file, ns=(0, 0))
+            other_value_loaded = convert.load(file, cache=cache)
+            assert other_value_loaded is not value_loaded
+            assert convert.load(file, cache=cache) is other_value_loaded
+        assert len(cache) == len(values)
+        cache.clear()
+        assert len(cache) == 0 and cache.size == 0
+
+
+def test_load_cache_evict():
+    cache = convert.cache.LoadCache(max_size=2000)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = pathlib.Path(tmp_dir)
+        files = [tmp_dir / f'test_file_{i}.npy' for i in range(4)]
+        for file in files:
+            convert.save(file, np.zeros(100))
+            convert.load(file, cache=cache)
+        assert len(cache) == 2 and cache.size == 1600
+        # least recently used file 3 is removed
+        value_2 = convert.load(files[2], cache=cache)
+        value_0 = convert.load(files[0], cache=cache)
+        assert convert.load(files[2], cache=cache) is value_2
+        assert convert.load(files[0], cache=cache) is value_0
+        assert len(cache) == 2
+        # too large values are not cached but read-only
+        file = tmp_dir / 'test_file.npy'
+        convert.save(file, np.zeros(1000))
+        value = convert.load(file, cache=cache)
+        assert not value.flags.writeable
+        assert convert.load(file, cache=cache) is not value
+        assert len(cache) == 2
+        # mappings of several arrays are neither cached nor read-only
+        file = tmp_dir / 'test_file.npz'
+        convert.save(file, {'a': np.zeros(10), 'b': np.ones(10)})
+        with convert.load(file, cache=cache) as value:
+            assert value['a'].flags.writeable
+        assert len(cache) == 2
@@ -0,0 +1,110 @@
+import os
+import pathlib
+import tempfile
+
+import pytest
+
+import convert
+import convert.compress
+from convert.compress import FILE_EXTENSIONS
+
+
+# *** tests *** #
+
+test_parallel_compress_setups = [
+    (size, block_size, threads, file_extension)
+    for size in (0, 1, 1000, 10000)
+    for block_size in (7, 1000, 2**22)
+    for threads in (2, 4)
+    for file_extension in FILE_EXTENSIONS
+]
+
+
+@pytest.mark.parametrize('size, block_size, threads, file_extension', test_parallel_compress_setups)
+def test_parallel_compress(size, block_size, threads, file_extension, monkeypatch):
+    monkeypatch.setattr(convert.compress, 'PARALLEL_BLOCK_SIZE', block_size)
+    data = os.urandom(size // 2) * 2
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file = (pathlib.Path(tmp_dir) / 'test_file').with_suffix(file_extension)
+        with convert.compress.compress_file_object(file, mode='wb', threads=threads) as file_object:
+            for i in range(0, size, 300):
+                file_object.write(data[i:i + 300])
+        with convert.compress.compress_file_object(file, mode='rb') as file_object:
+            data_loaded = file_object.read()
+    assert data == data_loaded
+
+
+test_compression_level_setups = [
+    (level, threads, file_extension)
+    for level in (None, 1, 9, 'fast', 'balanced', 'small')
+    for threads in (None, 2)
+    for file_extension in FILE_EXTENSIONS
+]
+
+
+@pytest.mark.parametrize('level, threads, file_extension', test_compression_level_setups)
+def test_compression_level(level, threads, file_extension):
+    data = b'0123456789' * 1000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file = (pathlib.Path(tmp_dir) / 'test_file').with_suffix(file_extension)
+        with convert.compress.compress_file_object(file, mode='wb', level=level, threads=threads) as file_object:
+            file_object.write(data)
+        with convert.compress.compress_file_object(file, mode='rb') as file_object:
+            data_loaded = file_object.read()
+    assert data == data_loaded
+
+
+@pytest.mark.parametrize('file_extension', FILE_EXTENSIONS)
+def test_compression_level_unknown_preset(file_extension):
+    with pytest.raises(ValueError):
+        convert.compress.compression_level(file_extension, 'unknown')
+
+
+@pytest.mark.skipif(convert.compress.ZSTD_FILE_EXTENSION not in FILE_EXTENSIONS,
+                    reason='zstandard is not available')
+def test_zstd_frames_and_seek():
+    import zstandard
+    data = os.urandom(1000)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file = pathlib.Path(tmp_dir) / 'test_file.zst'
+        with open(file, mode='wb') as file_object:
+            for i in range(0, len(data), 300):
+                file_object.write(zstandard.ZstdCompressor().compress(data[i:i + 300]))
+        with convert.compress.compress_file_object(file, mode='rb') as file_object:
+            assert file_object.read() == data
+            file_object.seek(500)
+            assert file_object.read(10) == data[500:510]
+            file_object.seek(-5, 1)
+            assert file_object.read() == data[505:]
+            file_object.seek(0)
+            assert file_object.read(10) == data[:10]
+
+
+test_recompress_file_setups = [
+    (file_extension_from, file_extension_to)
+    for file_extension_from in ('',) + FILE_EXTENSIONS
+    for file_extension_to in ('',) + FILE_EXTENSIONS
+]
+
+
+def _open(file, mode):
+    if pathlib.Path(file).suffix in FILE_EXTENSIONS:
+        return convert.compress.compress_file_object(file, mode=mode)
+    else:
+        return open(file, mode=mode)
+
+
+@pytest.mark.parametrize('file_extension_from, file_extension_to', test_recompress_file_setups)
+def test_recompress_file(file_extension_from, file_extension_to, monkeypatch):
+    monkeypatch.setattr(convert.compress, 'RECOMPRESS_BLOCK_SIZE', 1000)
+    # the bytes are no valid matrix, so they can only be converted by copying them
+    data = os.urandom(5000) * 2
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_from = pathlib.Path(tmp_dir) / ('test_file.mtx' + file_extension_from)
+        file_to = pathlib.Path(tmp_dir) / ('test_file_converted.mtx' + file_extension_to)
+        with _open(file_from, 'wb') as file_object:
+            file_object.write(data)
+        convert.convert_file(file_from, file_to, compression_level='fast', compression_threads=2)
+        with _open(file_to, 'rb') as file_object:
+            data_loaded = file_object.read()
+    assert data == data_loaded
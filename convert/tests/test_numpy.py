@@ -1,9 +1,19 @@
+import io
+import pathlib
+import pickle
+import subprocess
+import sys
+import tempfile
+import zipfile
+
 import numpy as np
 import pytest
 
+import convert
+import convert.numpy
 import convert.universal
 import convert.tests.universal
-from convert.numpy import FILE_EXTENSIONS
+from convert.numpy import FILE_EXTENSIONS, NUMPY_FILE_EXTENSION, NUMPY_COMPRESSED_FILE_EXTENSION
 
 
 # *** random array *** #
@@ -46,6 +56,86 @@ def test_save_load(shape, data_type, file_extension):
     assert np.allclose(value, other_value)
 
 
+@pytest.mark.parametrize('shape, data_type, file_extension', test_save_load_setups)
+def test_save_load_mmap(shape, data_type, file_extension):
+    value = random_array(shape, data_type=data_type)
+    other_value = convert.tests.universal.test_save_load(value, file_extension, mmap=True)
+    assert np.allclose(value, other_value)
+    assert isinstance(other_value, np.memmap) == (file_extension == NUMPY_FILE_EXTENSION)
+
+
+@pytest.mark.parametrize('shape, data_type, file_extension', test_save_load_setups)
+def test_save_load_compression_threads(shape, data_type, file_extension):
+    value = random_array(shape, data_type=data_type)
+    other_value = convert.tests.universal.test_save_load(value, file_extension, save_kwargs={'compression_threads': 2})
+    assert np.allclose(value, other_value)
+
+
+test_savetxt_setups = [
+    (shape, data_type)
+    for shape in ((10,), (2, 3), (0, 3), (3, 0), (100000, 3))
+    for data_type in DATA_TYPES
+]
+
+
+@pytest.mark.parametrize('shape, data_type', test_savetxt_setups)
+def test_savetxt(shape, data_type):
+    value = random_array(shape, data_type=data_type)
+    if data_type != DATA_TYPE_INT:
+        value = value - 0.5
+    file_object = io.BytesIO()
+    np.savetxt(file_object, value)
+    other_file_object = io.BytesIO()
+    convert.numpy._savetxt(other_file_object, value)
+    assert file_object.getvalue() == other_file_object.getvalue()
+
+
+test_loadtxt_setups = [
+    (shape, data_type, block_size)
+    for shape in ((10,), (1, 3), (20, 3))
+    for data_type in DATA_TYPES
+    for block_size in (1, 100, 2**22)
+]
+
+
+@pytest.mark.parametrize('shape, data_type, block_size', test_loadtxt_setups)
+def test_loadtxt(shape, data_type, block_size, monkeypatch):
+    monkeypatch.setattr(convert.numpy, 'TXT_BLOCK_SIZE', block_size)
+    value = random_array(shape, data_type=data_type)
+    file_object = io.BytesIO()
+    np.savetxt(file_object, value)
+    text = b'# comment\n' + file_object.getvalue() + b'\n'
+    other_value = convert.numpy._loadtxt(io.BytesIO(text))
+    assert other_value.dtype == (np.complex128 if data_type == DATA_TYPE_COMPLEX else np.float64)
+    assert other_value.shape == value.squeeze().shape
+    assert np.allclose(value.squeeze(), other_value)
+
+
+def test_loadtxt_complex_in_later_block(monkeypatch):
+    monkeypatch.setattr(convert.numpy, 'TXT_BLOCK_SIZE', 16)
+    text = b'1 2\n' * 10 + b'(3+4j) 5\n'
+    value = convert.numpy._loadtxt(io.BytesIO(text))
+    assert value.dtype == np.complex128
+    assert value.shape == (11, 2)
+    assert value[-1, 0] == 3 + 4j
+
+
+def test_loadtxt_old_numpy(monkeypatch):
+    monkeypatch.setattr(convert.numpy, 'TXT_BLOCK_SIZE', 16)
+    monkeypatch.setattr(np, '__version__', '1.22.4')
+    file_object = io.BytesIO(b'1 2\n' * 10 + b'(3+4j) 5\n')
+    value = convert.numpy._loadtxt(file_object)
+    assert value.dtype == np.complex128 and value.shape == (11, 2)
+    assert file_object.tell() == len(file_object.getvalue())
+
+
+def test_loadtxt_wrong_column_number(monkeypatch):
+    monkeypatch.setattr(convert.numpy, 'TXT_BLOCK_SIZE', 16)
+    text = b'1 2\n' * 10 + b'3\n'
+    with pytest.raises(ValueError):
+        convert.numpy._loadtxt(io.BytesIO(text))
+
+
 test_convert_setups = [
     (shape, data_type, file_extension, other_file_extension)
     for shape in ((10,), (2, 3))
@@ -67,3 +157,192 @@ def test_convert_file_extension(shape, data_type, file_extension, other_file_ext
     value = random_array(shape, data_type=data_type)
     other_value = convert.tests.universal.test_convert_file_extension(value, file_extension, other_file_extension)
     assert np.allclose(value, other_value)
+
+
+test_convert_chunks_setups = [
+    (shape, data_type, order, file_extension, other_file_extension)
+    for shape in ((10,), (2, 3), (3, 2, 2))
+    for data_type in DATA_TYPES
+    for order in ('C', 'F')
+    for file_extension in FILE_EXTENSIONS
+    if file_extension.startswith((NUMPY_FILE_EXTENSION, NUMPY_COMPRESSED_FILE_EXTENSION))
+    for other_file_extension in FILE_EXTENSIONS
+    if len(shape) <= 2 or other_file_extension.startswith((NUMPY_FILE_EXTENSION, NUMPY_COMPRESSED_FILE_EXTENSION))
+]
+
+
+@pytest.mark.parametrize('shape, data_type, order, file_extension, other_file_extension', test_convert_chunks_setups)
+def test_convert_file_chunks(shape, data_type, order, file_extension, other_file_extension):
+    value = np.asarray(random_array(shape, data_type=data_type), order=order)
+    other_value = convert.tests.universal.test_convert_file(value, file_extension, other_file_extension, chunk_size=1)
+    assert np.allclose(value, other_value)
+
+
+@pytest.mark.parametrize('shape', ((7, 3), (5, 2, 3)))
+def test_load_chunks_fortran_order(shape):
+    value = np.asfortranarray(random_array(shape))
+    chunk_size = 2 * value[0].nbytes
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file = pathlib.Path(tmp_dir) / 'test_file.npy'
+        convert.save(file, value)
+        with open(file, mode='rb') as file_object:
+            shape_loaded, dtype, chunks = convert.numpy.load_chunks(
+                file_object, NUMPY_FILE_EXTENSION, chunk_size=chunk_size)
+            chunks = list(chunks)
+    assert shape_loaded == shape and dtype == value.dtype
+    assert [len(chunk) for chunk in chunks[:-1]] == [2] * (len(chunks) - 1)
+    assert np.all(np.concatenate(chunks) == value)
+
+
+test_convert_file_copy_setups = [
+    (shape, data_type, order, file_extension, other_file_extension)
+    for shape in ((10,), (2, 3), (3, 2, 2))
+    for data_type in DATA_TYPES
+    for order in ('C', 'F')
+    for file_extension in FILE_EXTENSIONS
+    if file_extension.startswith(('.npy', '.npz'))
+    for other_file_extension in FILE_EXTENSIONS
+    if other_file_extension.startswith(('.npy', '.npz')) and
+    file_extension[:4] != other_file_extension[:4]
+]
+
+
+@pytest.mark.parametrize('shape, data_type, order, file_extension, other_file_extension', test_convert_file_copy_setups)
+def test_convert_file_copy(shape, data_type, order, file_extension, other_file_extension, monkeypatch):
+    monkeypatch.setattr(convert.numpy, 'COPY_BLOCK_SIZE', 7)
+    monkeypatch.delattr(convert.numpy, 'load_chunks')
+    value = np.asarray(random_array(shape, data_type=data_type), order=order)
+    other_value = convert.tests.universal.test_convert_file(value, file_extension, other_file_extension)
+    assert other_value.shape == value.shape
+    assert other_value.flags.f_contiguous == value.flags.f_contiguous
+    assert np.all(value == other_value)
+
+
+def test_save_load_several_arrays():
+    value = {name: random_array(shape, data_type=data_type)
+             for name, shape, data_type in (('a', (10,), DATA_TYPE_INT),
+                                            ('file', (2, 3), DATA_TYPE_FLOAT),
+                                            ('c', (3, 2, 2), DATA_TYPE_COMPLEX))}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file = pathlib.Path(tmp_dir) / 'test_file.npz'
+        convert.save(file, value)
+        with convert.load(file) as value_loaded:
+            assert isinstance(value_loaded, np.lib.npyio.NpzFile)
+            assert sorted(value_loaded.keys()) == sorted(value.keys())
+            for name, array in value.items():
+                assert np.all(value_loaded[name] == array)
+        # mmap is ignored for several arrays
+        with convert.load(file, mmap=True) as value_loaded:
+            assert not isinstance(value_loaded['a'], np.memmap)
+            assert np.all(value_loaded['a'] == value['a'])
+        with open(file, mode='rb') as file_object:
+            value_loaded = convert.numpy.load(io.BytesIO(file_object.read()), NUMPY_COMPRESSED_FILE_EXTENSION)
+        # file objects without a file name are loaded into the same type of mapping
+        with value_loaded:
+            assert isinstance(value_loaded, np.lib.npyio.NpzFile)
+            assert sorted(value_loaded.keys()) == sorted(value.keys())
+            assert np.all(value_loaded['c'] == value['c'])
+        with pytest.raises(ValueError):
+            convert.convert_file(file, pathlib.Path(tmp_dir) / 'test_file.npy')
+
+
+@pytest.mark.parametrize('workers', (1, 3))
+def test_npz_to_directory(workers, monkeypatch):
+    monkeypatch.setattr(convert.numpy, 'COPY_BLOCK_SIZE', 7)
+    value = {f'array_{i}': random_array((i + 1, 3), data_type=DATA_TYPES[i % 3]) for i in range(5)}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = pathlib.Path(tmp_dir)
+        file = tmp_dir / 'test_file.npz'
+        np.savez_compressed(file, **value)
+        files = convert.numpy.npz_to_directory(file, tmp_dir / 'arrays', workers=workers)
+        assert sorted(pathlib.Path(member_file).name for member_file in files) == sorted(
+            f'{name}.npy' for name in value)
+        for name, array in value.items():
+            assert np.all(np.load(tmp_dir / 'arrays' / f'{name}.npy') == array)
+        other_file = tmp_dir / 'test_file_converted.npz'
+        convert.numpy.directory_to_npz(tmp_dir / 'arrays', other_file)
+        with np.load(other_file) as value_loaded:
+            assert sorted(value_loaded.keys()) == sorted(value.keys())
+            for name, array in value.items():
+                assert np.all(value_loaded[name] == array)
+
+
+def _assert_npz_aligned(file):
+    with zipfile.ZipFile(file) as zip_file, open(file, mode='rb') as file_object:
+        for zip_info in zip_file.infolist():
+            assert zip_info.compress_type == zipfile.ZIP_STORED
+            with zip_file.open(zip_info) as member:
+                convert.numpy._read_npy_header(member)
+                offset = convert.numpy._npz_member_offset(file_object, zip_info) + member.tell()
+            assert offset % convert.numpy.NPZ_ALIGNMENT == 0
+
+
+@pytest.mark.parametrize('chunk_size', (None, 8))
+def test_save_uncompressed(chunk_size):
+    value = {f'array_{i}': random_array((i + 1, 3), data_type=DATA_TYPES[i % 3]) for i in range(5)}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = pathlib.Path(tmp_dir)
+        file = tmp_dir / 'test_file.npz'
+        convert.save(file, value, compressed=False)
+        _assert_npz_aligned(file)
+        with convert.load(file) as value_loaded:
+            for name, array in value.items():
+                assert np.all(value_loaded[name] == array)
+        # single array converted block by block
+        array = value['array_4']
+        convert.save(tmp_dir / 'test_file.npy', array)
+        other_file = convert.convert_file_extension(tmp_dir / 'test_file.npy', '.npz',
+                                                    chunk_size=chunk_size, compressed=False)
+        _assert_npz_aligned(other_file)
+        assert np.all(convert.load(other_file) == array)
+        array_loaded = convert.load(other_file, mmap=True)
+        assert isinstance(array_loaded, np.memmap) and np.all(array_loaded == array)
+        del array_loaded
+        # compression of other files is not changed
+        convert.save(tmp_dir / 'test_file.npy.gz', array, compressed=False)
+        assert np.all(convert.load(tmp_dir / 'test_file.npy.gz') == array)
+
+
+def test_npz_to_directory_invalid_name():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = pathlib.Path(tmp_dir)
+        file = tmp_dir / 'test_file.npz'
+        np.savez_compressed(file, **{'../a': np.arange(3)})
+        with pytest.raises(ValueError):
+            convert.numpy.npz_to_directory(file, tmp_dir / 'arrays')
+        assert not (tmp_dir / 'a.npy').exists()
+
+
+test_convert_many_setups = [
+    (workers, file_extension, other_file_extension)
+    for workers in (1, 2)
+    for file_extension in FILE_EXTENSIONS[:3]
+    for other_file_extension in FILE_EXTENSIONS[:3]
+]
+
+
+@pytest.mark.parametrize('workers, file_extension, other_file_extension', test_convert_many_setups)
+def test_convert_many(workers, file_extension, other_file_extension):
+    values = [random_array((2, 3), data_type=data_type) for data_type in DATA_TYPES]
+    other_values = convert.tests.universal.test_convert_many(values, file_extension, other_file_extension, workers=workers)
+    for value, other_value in zip(values, other_values):
+        assert np.allclose(value, other_value)
+
+
+def test_unsupported_error_pickle():
+    error = convert.universal.UnsupportedConversionError('a.npy', 'b.mtx', supported_file_extension_combinations=[('.npy', '.txt')])
+    other_error = pickle.loads(pickle.dumps(error))
+    assert other_error.message == error.message
+    error = convert.universal.UnsupportedFileExtensionError('a.abc', supported_file_extensions=['.npy'])
+    other_error = pickle.loads(pickle.dumps(error))
+    assert other_error.message == error.message
+
+
+def test_lazy_import():
+    code = ('import sys, pathlib, tempfile, convert\n'
+            'assert "numpy" not in sys.modules and "scipy" not in sys.modules\n'
+            'file = pathlib.Path(tempfile.mkdtemp()) / "test_file.npy"\n'
+            'convert.save(file, [1.0, 2.0])\n'
+            'convert.convert_file_extension(file, ".txt")\n'
+            'assert "numpy" in sys.modules and "scipy" not in sys.modules\n')
+    subprocess.run([sys.executable, '-c', code], check=True)
@@ -0,0 +1,74 @@
+import io
+import os
+import pathlib
+import tempfile
+
+import numpy as np
+import pytest
+
+import convert
+import convert.progress
+from convert.compress import FILE_EXTENSIONS
+
+
+# *** tests *** #
+
+test_convert_file_progress_setups = [('.npy', '.txt'), ('.npy', '.txt.bz2')] + [
+    ('.npy' + compress_file_extension, '.txt')
+    for compress_file_extension in FILE_EXTENSIONS
+]
+
+
+@pytest.mark.filterwarnings('error::ResourceWarning')
+@pytest.mark.parametrize('file_extension_from, file_extension_to', test_convert_file_progress_setups)
+def test_convert_file_progress(file_extension_from, file_extension_to, monkeypatch):
+    monkeypatch.setattr(convert.progress, 'PROGRESS_BLOCK_SIZE', 2**14)
+    value = np.random.default_rng(0).random((2500, 100))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file = pathlib.Path(tmp_dir) / ('test_file' + file_extension_from)
+        convert.save(file, value)
+        file_size = os.path.getsize(file)
+        calls = []
+        file_to = convert.convert_file_extension(file, file_extension_to, chunk_size=2**15,
+                                                 progress=lambda *args: calls.append(args))
+        assert np.all(convert.load(file_to) == value)
+    assert len(calls) > 2
+    assert all(size == file_size for _, size in calls)
+    assert calls[-1] == (file_size, file_size)
+    # the compressed file is read block by block
+    assert [read for read, _ in calls] == sorted(read for read, _ in calls)
+    assert calls[0][0] < file_size
+    assert convert.progress.current_progress() is None
+
+
+def test_convert_many_progress():
+    values = [np.arange(100.), np.arange(1000.)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = pathlib.Path(tmp_dir)
+        pairs = [(tmp_dir / f'test_file_{i}.npy', tmp_dir / f'test_file_{i}.txt')
+                 for i in range(len(values))]
+        for (file_from, _), value in zip(pairs, values):
+            convert.save(file_from, value)
+        pairs.append((tmp_dir / 'not_existing_file.npy', tmp_dir / 'not_existing_file.txt'))
+        total_size = sum(os.path.getsize(file_from) for file_from, _ in pairs[:2])
+        for workers in (1, 2):
+            calls = []
+            summary = convert.convert_many(pairs, workers=workers,
+                                           progress=lambda *args: calls.append(args))
+            assert len(summary.converted) == 2 and len(summary.failed) == 1
+            assert all(size == total_size for _, size in calls)
+            assert calls[-1] == (total_size, total_size)
+
+
+def test_progress_bar():
+    file = io.StringIO()
+    progress_bar = convert.progress.ProgressBar(file=file, interval=0)
+    progress_bar(0, 4 * 10**6)
+    progress_bar(10**6, 4 * 10**6)
+    progress_bar(4 * 10**6, 4 * 10**6)
+    progress_bar(4 * 10**6, 4 * 10**6)
+    lines = file.getvalue().split('\r')[1:]
+    assert len(lines) == 3
+    assert lines[0].startswith('  0.0 % (0.0 / 4.0 MB)')
+    assert lines[1].startswith(' 25.0 % (1.0 / 4.0 MB), ') and 'MB/s, ETA 0:' in lines[1]
+    assert lines[2].startswith('100.0 % (4.0 / 4.0 MB), ') and lines[2].endswith(os.linesep)
@@ -1,10 +1,18 @@
+import io
+import pathlib
+import tempfile
+import zipfile
+
 import numpy as np
+import scipy.io
 import scipy.sparse as sp
 import pytest
 
 import convert.universal
 import convert.tests.universal
 from convert.scipy import FILE_EXTENSIONS, MATRIX_FORMATS
+import convert.numpy
+import convert.scipy
 
 
 # *** random array *** #
@@ -82,6 +90,58 @@ def test_save_load(shape, data_type, matrix_type, matrix_format, file_extension)
     assert is_close(value, other_value)
 
 
+@pytest.mark.parametrize('shape, data_type, matrix_type, matrix_format, file_extension', test_save_load_setups)
+def test_save_load_compression_threads(shape, data_type, matrix_type, matrix_format, file_extension):
+    value = random_sparse_matrix(shape, data_type=data_type, matrix_type=matrix_type, matrix_format=matrix_format)
+    other_value = convert.tests.universal.test_save_load(value, file_extension, save_kwargs={'compression_threads': 2})
+    assert is_close(value, other_value)
+
+
+test_matrix_market_setups = [
+    (shape, dtype, matrix_type, matrix_format, block_size)
+    for shape in ((4, 4), (2, 3))
+    for dtype in (np.float64, np.float32, np.int64, np.uint8, np.complex128)
+    for matrix_type in MATRIX_TYPES
+    if shape[0] == shape[1] or matrix_type == MATRIX_TYPE_GENERAL
+    for matrix_format in MATRIX_FORMATS
+    for block_size in (1, 2**24)
+]
+
+
+@pytest.mark.parametrize('shape, dtype, matrix_type, matrix_format, block_size', test_matrix_market_setups)
+def test_matrix_market(shape, dtype, matrix_type, matrix_format, block_size, monkeypatch):
+    monkeypatch.setattr(convert.scipy, 'MATRIX_MARKET_BLOCK_SIZE', block_size)
+    value = random_sparse_matrix(shape, matrix_type=matrix_type, matrix_format=matrix_format)
+    if np.dtype(dtype).kind == 'c':
+        value = value + 1j * random_sparse_matrix(shape, matrix_type=matrix_type, matrix_format=matrix_format)
+    value = (value * 10).astype(dtype)
+    # write
+    file_object = io.BytesIO()
+    scipy.io.mmwrite(file_object, value.copy())
+    other_file_object = io.BytesIO()
+    convert.scipy._mmwrite(other_file_object, value.copy())
+    assert file_object.getvalue() == other_file_object.getvalue()
+    # read
+    value = scipy.io.mmread(io.BytesIO(file_object.getvalue()))
+    other_value = convert.scipy._mmread(io.BytesIO(file_object.getvalue()))
+    assert value.dtype == other_value.dtype
+    assert np.array_equal(value.row, other_value.row)
+    assert np.array_equal(value.col, other_value.col)
+    assert np.array_equal(value.data, other_value.data)
+
+
+@pytest.mark.parametrize('block_size', (1, 2**24))
+def test_matrix_market_invalid_value(block_size, monkeypatch):
+    monkeypatch.setattr(convert.scipy, 'MATRIX_MARKET_BLOCK_SIZE', block_size)
+    text = b'%%MatrixMarket matrix coordinate real general\n2 2 2\n1 1 1.5d0\n\n2 2 2.5\n'
+    with pytest.raises(ValueError):
+        convert.scipy._mmread(io.BytesIO(text))
+    # empty lines and comments between entries are skipped
+    text = b'%%MatrixMarket matrix coordinate real general\n2 2 2\n1 1 1.5\n\n% comment\n2 2 2.5\n'
+    value = convert.scipy._mmread(io.BytesIO(text))
+    assert np.all(value.toarray() == [[1.5, 0], [0, 2.5]])
+
+
 test_convert_setups = [
     (shape, data_type, MATRIX_TYPE_GENERAL, matrix_format, file_extension, other_file_extension)
     for shape in ((10, 1), (2, 3))
@@ -112,3 +172,134 @@ def test_convert_file_extension(shape, data_type, matrix_type, matrix_format, fi
     value = random_sparse_matrix(shape, data_type=data_type, matrix_type=matrix_type, matrix_format=matrix_format)
     other_value = convert.tests.universal.test_convert_file_extension(value, file_extension, other_file_extension)
     assert is_close(value, other_value)
+
+
+test_convert_dense_setups = [
+    (shape, matrix_format, file_extension, dense_file_extension, chunk_size)
+    for shape in ((10, 1), (2, 3), (4, 4))
+    for matrix_format in ('csr',)
+    for file_extension in FILE_EXTENSIONS
+    for dense_file_extension in convert.numpy.FILE_EXTENSIONS
+    for chunk_size in (None, 1)
+]
+
+
+@pytest.mark.parametrize('shape, matrix_format, file_extension, dense_file_extension, chunk_size', test_convert_dense_setups)
+def test_convert_file_sparse_to_dense(shape, matrix_format, file_extension, dense_file_extension, chunk_size):
+    value = random_sparse_matrix(shape, matrix_format=matrix_format)
+    other_value = convert.tests.universal.test_convert_file(value, file_extension, dense_file_extension, chunk_size=chunk_size)
+    assert np.allclose(value.toarray().squeeze(), other_value.squeeze())
+
+
+@pytest.mark.parametrize('shape, matrix_format, file_extension, dense_file_extension, chunk_size', test_convert_dense_setups)
+def test_convert_file_dense_to_sparse(shape, matrix_format, file_extension, dense_file_extension, chunk_size):
+    value = random_sparse_matrix(shape, matrix_format=matrix_format).toarray()
+    other_value = convert.tests.universal.test_convert_file(value, dense_file_extension, file_extension, chunk_size=chunk_size)
+    assert sp.issparse(other_value)
+    assert np.allclose(value, other_value.toarray())
+
+
+@pytest.mark.parametrize('dense_file_extension', convert.numpy.FILE_EXTENSIONS)
+@pytest.mark.parametrize('chunk_size', (None, 1))
+def test_convert_file_dense_matrix_market(dense_file_extension, chunk_size):
+    value = np.arange(12.).reshape(4, 3)
+    other_value = convert.tests.universal.test_convert_file(value, '.mtx', dense_file_extension, chunk_size=chunk_size)
+    assert isinstance(other_value, np.ndarray)
+    assert np.all(value == other_value)
+
+
+@pytest.mark.parametrize('matrix_format', ('csr', 'csc'))
+@pytest.mark.parametrize('index', (slice(None), slice(3, 17), slice(10, 3), slice(None, None, -3),
+                                   slice(5, 45, 4), slice(-5, None), slice(40, 2, -7)))
+def test_load_slice(matrix_format, index):
+    value = random_sparse_matrix((50, 40), matrix_format=matrix_format)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file = pathlib.Path(tmp_dir) / f'test_file.{matrix_format}.npz'
+        convert.universal.save(file, value)
+        if matrix_format == 'csr':
+            other_value = convert.universal.load(file, rows=index)
+            value = value[index]
+        else:
+            other_value = convert.universal.load(file, columns=index)
+            value = value[:, index]
+        assert other_value.format == matrix_format
+        assert is_close(value, other_value)
+        # only slices of the major axis are supported
+        with pytest.raises(ValueError):
+            if matrix_format == 'csr':
+                convert.universal.load(file, columns=index)
+            else:
+                convert.universal.load(file, rows=index)
+
+
+@pytest.mark.parametrize('matrix_format', MATRIX_FORMATS)
+def test_save_uncompressed(matrix_format):
+    value = random_sparse_matrix((30, 20), matrix_format=matrix_format)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file = pathlib.Path(tmp_dir) / f'test_file.{matrix_format}.npz'
+        convert.universal.save(file, value, compressed=False)
+        with zipfile.ZipFile(file) as zip_file:
+            assert all(zip_info.compress_type == zipfile.ZIP_STORED
+                       for zip_info in zip_file.infolist())
+        other_value = convert.universal.load(file)
+        assert other_value.format == matrix_format
+        assert is_close(value, other_value)
+        # same arrays as saved by scipy
+        other_file = pathlib.Path(tmp_dir) / 'other_test_file.npz'
+        sp.save_npz(other_file, value, compressed=False)
+        with np.load(file) as arrays, np.load(other_file) as other_arrays:
+            assert arrays.files == other_arrays.files
+            for name in arrays.files:
+                assert np.array_equal(arrays[name], other_arrays[name])
+
+
+def is_memmap(array):
+    while array is not None and not isinstance(array, np.memmap):
+        array = array.base
+    return array is not None
+
+
+@pytest.mark.parametrize('matrix_format', MATRIX_FORMATS)
+@pytest.mark.parametrize('compressed', (True, False))
+def test_load_mmap(matrix_format, compressed):
+    value = random_sparse_matrix((30, 20), matrix_format=matrix_format)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file = pathlib.Path(tmp_dir) / f'test_file.{matrix_format}.npz'
+        convert.universal.save(file, value, compressed=compressed)
+        other_value = convert.universal.load(file, mmap=True)
+        assert other_value.format == matrix_format
+        assert is_close(value, other_value)
+        assert is_memmap(other_value.data) != compressed
+        # memory-mapped slice
+        if matrix_format in ('csr', 'csc'):
+            index = slice(4, 11)
+            if matrix_format == 'csr':
+                other_value = convert.universal.load(file, mmap=True, rows=index)
+                value = value[index]
+            else:
+                other_value = convert.universal.load(file, mmap=True, columns=index)
+                value = value[:, index]
+            assert is_close(value, other_value)
+        del other_value
+
+
+@pytest.mark.parametrize('matrix_format', ('coo', 'csr', 'csc'))
+def test_load_mmap_not_canonical(matrix_format):
+    # duplicate and unsorted entries
+    data = np.array([-4., 2., -3., -5., -6.])
+    if matrix_format == 'coo':
+        value = sp.coo_matrix((data.copy(), ([0, 0, 0, 1, 1], [1, 0, 0, 0, 1])), shape=(2, 2))
+    else:
+        matrix_class = getattr(sp, f'{matrix_format}_matrix')
+        value = matrix_class((data.copy(), [1, 0, 0, 0, 1], [0, 3, 5]), shape=(2, 2))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file = pathlib.Path(tmp_dir) / f'test_file.{matrix_format}.npz'
+        convert.universal.save(file, value, compressed=False)
+        other_value = convert.universal.load(file, mmap=True)
+        assert is_memmap(other_value.data)
+        assert other_value.max() == value.max() == -1
+        assert np.all(other_value.toarray() == value.toarray())
+        del other_value
+        # the file is not changed
+        other_value = convert.universal.load(file)
+        assert np.all(other_value.data == data)
@@ -0,0 +1,87 @@
+import os
+import pathlib
+import tempfile
+
+import numpy as np
+import pytest
+
+import convert
+import convert.numpy
+import convert.trace
+
+
+# *** tests *** #
+
+def test_profile():
+    value = np.arange(1000.).reshape(100, 10)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = pathlib.Path(tmp_dir)
+        file = tmp_dir / 'test_file.npy'
+        file_to = tmp_dir / 'test_file.txt.gz'
+        with convert.trace.Profile() as profile:
+            convert.save(file, value)
+            convert.convert_file(file, file_to)
+            assert np.all(convert.load(file_to) == value)
+        assert profile not in convert.trace.TRACERS
+
+        save_record, convert_record, load_record = profile.records
+        assert (save_record.operation, save_record.file_from, save_record.file_to) == ('save', None, file)
+        assert save_record.bytes_written == os.path.getsize(file) == save_record.file_size_to
+        assert (convert_record.operation, convert_record.file_from, convert_record.file_to) == (
+            'convert', file, file_to)
+        assert convert_record.file_size_from == os.path.getsize(file)
+        assert convert_record.file_size_to == os.path.getsize(file_to)
+        # text is compressed
+        assert convert_record.bytes_written > convert_record.file_size_to
+        assert load_record.bytes_read == convert_record.bytes_written
+        for record in profile.records:
+            assert set(record.stages) == set(convert.trace.STAGES)
+            assert record.seconds >= sum(record.stages.values()) * 0.999
+        summary = profile.summary()
+        assert len(summary.splitlines()) == 4
+        assert str(file_to) in summary
+
+
+def test_tracer_mmap():
+    records = []
+    convert.trace.add_tracer(records.append)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file = pathlib.Path(tmp_dir) / 'test_file.npy'
+            convert.save(file, np.zeros(10))
+            value = convert.load(file, mmap=True)
+            assert isinstance(value, np.memmap)
+            del value
+            file_size = os.path.getsize(file)
+    finally:
+        convert.trace.remove_tracer(records.append)
+    assert [record.operation for record in records] == ['save', 'load']
+    assert records[1].file_size_from == file_size
+
+
+def test_tracer_error(monkeypatch):
+    def save(file_object, file_extension, value):
+        raise ValueError('The value could not be saved.')
+
+    monkeypatch.setattr(convert.numpy, 'save', save)
+    records = []
+    convert.trace.add_tracer(records.append)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with pytest.raises(ValueError):
+                convert.save(pathlib.Path(tmp_dir) / 'test_file.npy', np.zeros(10))
+    finally:
+        convert.trace.remove_tracer(records.append)
+    assert records == []
+    assert convert.trace.current_trace() is None
+
+
+def test_not_traced(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError('The file was traced.')
+
+    monkeypatch.setattr(convert.trace._Trace, 'open', fail)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file = pathlib.Path(tmp_dir) / 'test_file.npy'
+        convert.save(file, np.zeros(10))
+        convert.convert_file_extension(file, '.txt')
@@ -0,0 +1,171 @@
+import os
+import pathlib
+import stat
+import sys
+import tempfile
+import types
+
+import pytest
+
+import convert
+import convert.numpy
+import convert.scipy
+import convert.universal
+
+
+# *** helpers *** #
+
+def _bytes_module(file_extensions=('.raw', '.raw.gz')):
+    module = types.ModuleType('bytes_module')
+    module.FILE_EXTENSIONS = file_extensions
+    module.BINARY_MODE_DICT = {'.raw': True}
+
+    def load(file_object, file_extension, **kwargs):
+        return file_object.read()
+
+    def save(file_object, file_extension, value):
+        file_object.write(value)
+
+    module.load = load
+    module.save = save
+    return module
+
+
+# *** tests *** #
+
+@pytest.mark.parametrize('file, module, file_extension', [
+    ('a.npy', convert.numpy, '.npy'),
+    ('a.b.npy.gz', convert.numpy, '.npy.gz'),
+    ('a.csr.npz', convert.scipy, '.csr.npz'),
+    ('a.x.npz', convert.numpy, '.npz'),
+    ('.npz', convert.numpy, '.npz'),
+    (pathlib.Path('dir.csr.npz') / 'a.npz', convert.numpy, '.npz'),
+])
+def test_module_and_file_extension(file, module, file_extension):
+    assert convert.universal._module_and_file_extension(file) == (module, file_extension)
+
+
+@pytest.mark.parametrize('file', ['a', 'a.gz', 'npy', 'a.npy.zip', str(pathlib.Path('a.npy') / 'b')])
+def test_module_and_file_extension_unsupported(file):
+    with pytest.raises(convert.UnsupportedFileExtensionError):
+        convert.universal._module_and_file_extension(file)
+
+
+def test_register_module():
+    module = _bytes_module()
+    convert.register_module(module)
+    try:
+        assert '.raw.gz' in convert.universal.SUPPORTED_FILE_EXTENSIONS
+        assert ('.raw', '.raw.gz') in convert.universal.SUPPORTED_FILE_EXTENSION_COMBINATIONS
+        assert ('.raw', '.npy') not in convert.universal.SUPPORTED_FILE_EXTENSION_COMBINATIONS
+        value = b'some bytes'
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file = pathlib.Path(tmp_dir) / 'test_file.raw'
+            convert.save(file, value)
+            assert convert.load(file) == value
+            file_to = convert.convert_file_extension(file, '.raw.gz')
+            assert convert.load(file_to) == value
+            with pytest.raises(convert.UnsupportedConversionError):
+                convert.convert_file_extension(file, '.npy')
+    finally:
+        convert.unregister_module(module)
+    assert '.raw' not in convert.universal.SUPPORTED_FILE_EXTENSIONS
+    with pytest.raises(convert.UnsupportedFileExtensionError):
+        convert.universal._module_and_file_extension('test_file.raw')
+
+
+@pytest.mark.parametrize('file_extensions', [('.raw', '.npy'), ('raw',)])
+def test_register_module_invalid(file_extensions):
+    supported_file_extensions = list(convert.universal.SUPPORTED_FILE_EXTENSIONS)
+    with pytest.raises(ValueError):
+        convert.register_module(_bytes_module(file_extensions=file_extensions))
+    assert convert.universal.SUPPORTED_FILE_EXTENSIONS == supported_file_extensions
+
+
+def test_register_module_required_packages():
+    module = _bytes_module()
+    module.REQUIRED_PACKAGES = ('not_existing_package',)
+    with pytest.raises(ImportError):
+        convert.register_module(module)
+    assert module not in convert.universal.SUPPORTED_MODULES
+
+
+def test_register_entry_point_modules(monkeypatch):
+    module = _bytes_module()
+    invalid_module = _bytes_module(file_extensions=('.npy',))
+    entry_points = [types.SimpleNamespace(name=name, value=name, load=lambda module=module: module)
+                    for name, module in (('bytes', module), ('invalid', invalid_module))]
+    monkeypatch.setattr(convert.universal, '_entry_points', lambda group: entry_points)
+    monkeypatch.setattr(convert.universal, '_entry_point_modules_registered', False)
+    try:
+        with pytest.warns(ImportWarning):
+            assert convert.universal._module_and_file_extension('a.raw') == (module, '.raw')
+        assert invalid_module not in convert.universal.SUPPORTED_MODULES
+    finally:
+        convert.unregister_module(module)
+
+
+def test_register_installed_entry_point_modules(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = pathlib.Path(tmp_dir)
+        # installed distribution with an entry point
+        (tmp_dir / 'io_convert_test_module.py').write_text(
+            "FILE_EXTENSIONS = ('.rawtest',)\n"
+            "BINARY_MODE_DICT = {'.rawtest': True}\n"
+            "def load(file_object, file_extension):\n"
+            "    return file_object.read()\n"
+            "def save(file_object, file_extension, value):\n"
+            "    file_object.write(value)\n")
+        dist_info = tmp_dir / 'io_convert_test_module-1.0.dist-info'
+        dist_info.mkdir()
+        (dist_info / 'METADATA').write_text(
+            'Metadata-Version: 2.1\nName: io-convert-test-module\nVersion: 1.0\n')
+        (dist_info / 'entry_points.txt').write_text(
+            f'[{convert.universal.ENTRY_POINT_GROUP}]\n'
+            f'rawtest = io_convert_test_module\n')
+        monkeypatch.syspath_prepend(str(tmp_dir))
+        monkeypatch.setattr(convert.universal, '_entry_point_modules_registered', False)
+        try:
+            module, file_extension = convert.universal._module_and_file_extension('a.rawtest')
+            assert module.__name__ == 'io_convert_test_module' and file_extension == '.rawtest'
+        finally:
+            module = sys.modules.pop('io_convert_test_module', None)
+            if module in convert.universal.SUPPORTED_MODULES:
+                convert.unregister_module(module)
+
+
+@pytest.mark.parametrize('file_extension', ('.raw', '.raw.gz'))
+@pytest.mark.parametrize('fsync', (False, True))
+def test_save_atomic(file_extension, fsync):
+    module = _bytes_module()
+
+    def save(file_object, file_extension, value):
+        file_object.write(value[:3])
+        if value == b'fail':
+            raise KeyboardInterrupt
+
+    module.save = save
+    convert.register_module(module)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file = pathlib.Path(tmp_dir) / ('test_file' + file_extension)
+            convert.save(file, b'value', fsync=fsync)
+            assert convert.load(file) == b'val'
+            file.chmod(0o640)
+            # failed save keeps the old file
+            with pytest.raises(KeyboardInterrupt):
+                convert.save(file, b'fail', fsync=fsync)
+            assert convert.load(file) == b'val'
+            assert os.listdir(tmp_dir) == [file.name]
+            # mode of replaced file is kept
+            convert.save(file, b'other', fsync=fsync)
+            assert convert.load(file) == b'oth'
+            assert stat.S_IMODE(file.stat().st_mode) == 0o640
+            # converted file is written atomically too
+            other_file_extension = '.raw' if file_extension == '.raw.gz' else '.raw.gz'
+            other_file = pathlib.Path(tmp_dir) / ('test_file_converted' + other_file_extension)
+            convert.convert_file(file, other_file, fsync=fsync)
+            assert convert.load(other_file) == b'oth'
+            assert sorted(os.listdir(tmp_dir)) == sorted([file.name, other_file.name])
+    finally:
+        convert.unregister_module(module)
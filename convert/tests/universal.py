@@ -4,21 +4,23 @@ import tempfile
 import convert
 
 
-def test_save_load(value, file_extension):
+def test_save_load(value, file_extension, save_kwargs=None, **kwargs):
     FILENAME = pathlib.Path('test_file')
+    if save_kwargs is None:
+        save_kwargs = {}
     with tempfile.TemporaryDirectory() as tmp_dir:
         # save file
         base_file = pathlib.Path(tmp_dir) / FILENAME
         file = base_file.with_suffix(file_extension)
-        convert.save(file, value)
+        convert.save(file, value, **save_kwargs)
         assert file.exists()
         # load file
-        value_loaded = convert.load(file)
+        value_loaded = convert.load(file, **kwargs)
         assert file.exists()
     return value_loaded
 
 
-def test_convert_file(value, file_extension, other_file_extension):
+def test_convert_file(value, file_extension, other_file_extension, **kwargs):
     FILENAME_FROM = pathlib.Path('test_file')
     FILENAME_TO = pathlib.Path('test_file_converted')
     with tempfile.TemporaryDirectory() as tmp_dir:
@@ -30,7 +32,7 @@ def test_convert_file(value, file_extension, other_file_extension):
         # convert file
         base_file_to = pathlib.Path(tmp_dir) / FILENAME_TO
         other_file = base_file_to.with_suffix(other_file_extension)
-        convert.convert_file(file, other_file)
+        convert.convert_file(file, other_file, **kwargs)
         assert file.exists()
         assert other_file.exists()
         # load converted file
@@ -54,3 +56,26 @@ def test_convert_file_extension(value, file_extension, other_file_extension):
         # load converted file
         value_loaded = convert.load(other_file)
     return value_loaded
+
+
+def test_convert_many(values, file_extension, other_file_extension, workers=None):
+    FILENAME = 'test_file_{}'
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # save base files
+        files = [(pathlib.Path(tmp_dir) / FILENAME.format(i)).with_suffix(file_extension)
+                 for i in range(len(values))]
+        for file, value in zip(files, values):
+            convert.save(file, value)
+        # convert files with an additional missing file
+        missing_file = (pathlib.Path(tmp_dir) / FILENAME.format('missing')).with_suffix(file_extension)
+        files_from = files + [missing_file]
+        files_to = [file.with_name(file.name[:-len(file_extension)] + '_converted' + other_file_extension)
+                    for file in files_from]
+        summary = convert.convert_many(zip(files_from, files_to), workers=workers)
+        assert summary.converted == list(zip(files, files_to[:-1]))
+        assert len(summary.failed) == 1
+        assert summary.failed[0][:2] == (missing_file, files_to[-1])
+        assert isinstance(summary.failed[0][2], FileNotFoundError)
+        # load converted files
+        values_loaded = [convert.load(file) for file in files_to[:-1]]
+    return values_loaded
@@ -0,0 +1,270 @@
+import collections
+import contextlib
+import os
+import threading
+import time
+
+
+# *** records *** #
+
+#: The stages of a load, save or conversion whose wall times are traced.
+STAGES = ('open', 'read', 'process', 'write', 'close')
+
+TraceRecord = collections.namedtuple('TraceRecord', (
+    'operation', 'file_from', 'file_to', 'seconds', 'stages',
+    'bytes_read', 'bytes_written', 'file_size_from', 'file_size_to'))
+TraceRecord.__doc__ = """
+A record of a load, save or conversion.
+
+`operation` is 'load', 'save' or 'convert'. `file_from` is the read file and `file_to` the
+written file, each None if not applicable. `seconds` is the total wall time and `stages` a dict
+with the wall time of each stage in :data:`convert.trace.STAGES`: opening the files, reading (including
+decompression), processing (parsing, formatting and converting the values), writing (including
+compression) and closing the files (including flushing of compressed data). `bytes_read` and
+`bytes_written` are the numbers of bytes (or characters for text files) read from and written to
+the opened files, i.e. after decompression and before compression by a compression file extension.
+`file_size_from` and `file_size_to` are the sizes of the files on disk.
+"""
+
+
+def _format_size(size):
+    return f'{size / 2**20:.1f} MiB'
+
+
+def format_record(record):
+    """ Returns a human-readable summary of a :class:`TraceRecord`. """
+    if record.operation == 'convert':
+        name = f'convert {record.file_from} -> {record.file_to}'
+    elif record.operation == 'load':
+        name = f'load {record.file_from}'
+    else:
+        name = f'save {record.file_to}'
+    stages = ', '.join(f'{stage} {record.stages[stage]:.3f} s' for stage in STAGES
+                       if record.stages.get(stage, 0) > 0)
+    text = f'{name}: {record.seconds:.3f} s ({stages})'
+    if record.file_from is not None:
+        text += f', read {_format_size(record.bytes_read)}'
+        if record.file_size_from is not None:
+            text += f' ({_format_size(record.file_size_from)} on disk)'
+    if record.file_to is not None:
+        text += f', written {_format_size(record.bytes_written)}'
+        if record.file_size_to is not None:
+            text += f' ({_format_size(record.file_size_to)} on disk)'
+    return text
+
+
+# *** tracer registry *** #
+
+TRACERS = []
+
+
+def add_tracer(tracer):
+    """
+    Adds a tracer which is called with a :class:`TraceRecord` after each load, save or
+    conversion.
+
+    Parameters
+    ----------
+    tracer : callable
+        A function with one argument. It is called in the thread which carried out the
+        operation.
+    """
+
+    TRACERS.append(tracer)
+
+
+def remove_tracer(tracer):
+    """
+    Removes a tracer added by :func:`add_tracer`.
+
+    Parameters
+    ----------
+    tracer : callable
+        The added tracer.
+    """
+
+    TRACERS.remove(tracer)
+
+
+class Profile:
+    """
+    A context manager which collects the :class:`TraceRecord` of each load, save or conversion
+    within its context.
+
+    Attributes
+    ----------
+    records : list of TraceRecord
+        The collected records.
+    """
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def __enter__(self):
+        add_tracer(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        remove_tracer(self)
+
+    def summary(self):
+        """ Returns a human-readable summary of the collected records. """
+        lines = [format_record(record) for record in self.records]
+        if len(self.records) > 1:
+            stages = {stage: sum(record.stages.get(stage, 0) for record in self.records)
+                      for stage in STAGES}
+            total = {'seconds': sum(record.seconds for record in self.records), 'stages': stages,
+                     'bytes_read': sum(record.bytes_read for record in self.records),
+                     'bytes_written': sum(record.bytes_written for record in self.records)}
+            stage_times = ', '.join(f'{stage} {seconds:.3f} s'
+                                    for stage, seconds in stages.items() if seconds > 0)
+            lines.append(f'total of {len(self.records)} operations: {total["seconds"]:.3f} s '
+                         f'({stage_times}), read {_format_size(total["bytes_read"])}, '
+                         f'written {_format_size(total["bytes_written"])}')
+        return os.linesep.join(lines)
+
+
+# *** traces *** #
+
+_thread_state = threading.local()
+
+
+def current_trace():
+    """ Returns the trace of the operation in the current thread or None. """
+    return getattr(_thread_state, 'trace', None)
+
+
+class _TracedFile:
+    """ A file object which measures the time and the number of bytes of reads and writes. """
+
+    def __init__(self, file_object, trace, file, mode):
+        self._file_object = file_object
+        self._trace = trace
+        self._file = file
+        self._mode = mode
+
+    def __getattr__(self, name):
+        return getattr(self._file_object, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def _read(self, function, *args):
+        start = time.perf_counter()
+        data = function(*args)
+        self._trace.add_read(time.perf_counter() - start, len(data))
+        return data
+
+    def read(self, *args):
+        return self._read(self._file_object.read, *args)
+
+    def read1(self, *args):
+        return self._read(self._file_object.read1, *args)
+
+    def readline(self, *args):
+        return self._read(self._file_object.readline, *args)
+
+    def readinto(self, buffer):
+        start = time.perf_counter()
+        size = self._file_object.readinto(buffer)
+        self._trace.add_read(time.perf_counter() - start, size)
+        return size
+
+    def write(self, data):
+        start = time.perf_counter()
+        result = self._file_object.write(data)
+        size = len(data) if isinstance(data, str) else memoryview(data).nbytes
+        self._trace.add_write(time.perf_counter() - start, size)
+        return result
+
+    def close(self):
+        if self._file_object.closed:
+            return
+        start = time.perf_counter()
+        self._file_object.close()
+        self._trace.add_stage('close', time.perf_counter() - start)
+        if self._mode.startswith('w'):
+            self._trace.file_size_to = os.path.getsize(self._file)
+
+
+class _Trace:
+    """ The measurements of one load, save or conversion. """
+
+    def __init__(self, operation, file_from, file_to):
+        self.operation = operation
+        self.file_from = file_from
+        self.file_to = file_to
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.file_size_from = None
+        self.file_size_to = None
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def add_stage(self, stage, seconds):
+        with self._lock:
+            self.stages[stage] += seconds
+
+    def add_read(self, seconds, size):
+        with self._lock:
+            self.stages['read'] += seconds
+            self.bytes_read += size
+
+    def add_write(self, seconds, size):
+        with self._lock:
+            self.stages['write'] += seconds
+            self.bytes_written += size
+
+    def open(self, open_function, file, mode, wrap=True):
+        start = time.perf_counter()
+        file_object = open_function()
+        self.add_stage('open', time.perf_counter() - start)
+        if mode.startswith('r'):
+            self.file_size_from = os.path.getsize(file)
+        if wrap:
+            file_object = _TracedFile(file_object, self, file, mode)
+        return file_object
+
+    def record(self):
+        seconds = time.perf_counter() - self._start
+        stages = dict(self.stages)
+        stages['process'] = max(0.0, seconds - sum(stages.values()))
+        return TraceRecord(self.operation, self.file_from, self.file_to, seconds, stages,
+                           self.bytes_read, self.bytes_written,
+                           self.file_size_from, self.file_size_to)
+
+
+@contextlib.contextmanager
+def trace(operation, file_from=None, file_to=None):
+    """ Traces an operation if tracers are registered and no other operation is traced in the
+    current thread. """
+    if len(TRACERS) == 0 or current_trace() is not None:
+        yield current_trace()
+        return
+    current = _Trace(operation, file_from, file_to)
+    _thread_state.trace = current
+    try:
+        yield current
+    finally:
+        _thread_state.trace = None
+    record = current.record()
+    for tracer in tuple(TRACERS):
+        tracer(record)
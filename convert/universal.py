@@ -1,7 +1,16 @@
+import collections
+import contextlib
 import importlib
+import importlib.util
+import os
+import stat
+import threading
 import warnings
 
+import convert.cache
 import convert.compress
+import convert.progress
+import convert.trace
 
 
 class UnsupportedFileExtensionError(ValueError):
@@ -16,6 +25,9 @@ class UnsupportedFileExtensionError(ValueError):
         self.message = message
         super().__init__(message)
 
+    def __reduce__(self):
+        return (type(self), (self.file, getattr(self, 'supported_file_extensions', None)))
+
 
 class UnsupportedConversionError(ValueError):
     """ The file extension is not supported. """
@@ -31,83 +43,356 @@ class UnsupportedConversionError(ValueError):
         self.message = message
         super().__init__(message)
 
+    def __reduce__(self):
+        return (type(self), (self.file_from, self.file_to,
+                             getattr(self, 'supported_file_extension_combinations', None)))
+
+
+# *** module registry *** #
+
+ENTRY_POINT_GROUP = 'io_convert.modules'
 
 SUPPORTED_MODULES = []
+SUPPORTED_FILE_EXTENSIONS = []
+SUPPORTED_FILE_EXTENSION_COMBINATIONS = []
+
+_FILE_EXTENSION_MODULES = {}
+_entry_point_modules_registered = False
+
+
+def _supports_conversion(module_from, module_to):
+    # values of different modules are exchanged as dense row blocks
+    return module_from is module_to or all(
+        hasattr(module, function_name)
+        for module in (module_from, module_to)
+        for function_name in ('load_chunks', 'save_chunks'))
+
+
+def _module_name(module):
+    return getattr(module, '__name__', module)
+
+
+def _update_supported_file_extensions():
+    SUPPORTED_FILE_EXTENSIONS[:] = [file_extension
+                                    for module in SUPPORTED_MODULES
+                                    for file_extension in module.FILE_EXTENSIONS]
+    SUPPORTED_FILE_EXTENSION_COMBINATIONS[:] = [(file_extension_1, file_extension_2)
+                                                for module_1 in SUPPORTED_MODULES
+                                                for module_2 in SUPPORTED_MODULES
+                                                if _supports_conversion(module_1, module_2)
+                                                for file_extension_1 in module_1.FILE_EXTENSIONS
+                                                for file_extension_2 in module_2.FILE_EXTENSIONS]
+
+
+def register_module(module):
+    """
+    Registers a module which loads and saves files with certain file extensions.
+
+    A module has to provide the following attributes:
+
+    * `FILE_EXTENSIONS`: the supported file extensions, each starting with a dot.
+    * `BINARY_MODE_DICT`: a dict which maps each file extension without compression file
+      extension to a bool indicating whether the file is opened in binary mode.
+    * `load(file_object, file_extension, **kwargs)`: returns the value stored in the file object.
+    * `save(file_object, file_extension, value)`: saves the value in the file object.
+
+    Optionally, it can provide `REQUIRED_PACKAGES`, the names of packages which have to be
+    available, and the functions `load_chunks(file_object, file_extension, chunk_size=None)`,
+    returning a tuple `(shape, dtype, chunks)` with an iterable of blocks of rows, and
+    `save_chunks(file_object, file_extension, shape, dtype, chunks)`. Files of modules with these
+    two functions can be converted into files of other such modules. A module can also provide
+    `COPY_FILE_EXTENSION_COMBINATIONS`, pairs of file extensions without compression file
+    extension, and `copy_file_object(file_object_from, file_extension_from, file_object_to,
+    file_extension_to)` which converts such files without loading the value.
+
+    Modules can also be registered by other packages with an entry point in the group
+    `io_convert.modules` which refers to the module. These modules are registered when a file
+    extension is looked up the first time.
+
+    Parameters
+    ----------
+    module : types.ModuleType or str
+        The module or its name.
+
+    Returns
+    -------
+    types.ModuleType
+        The registered module.
+
+    Raises
+    ------
+    ImportError
+        If the module or one of its required packages is not available.
+    ValueError
+        If a file extension of the module is invalid or already registered by another module.
+    """
+
+    if isinstance(module, str):
+        module = importlib.import_module(module)
+    if module in SUPPORTED_MODULES:
+        return module
+    for package in getattr(module, 'REQUIRED_PACKAGES', ()):
+        if importlib.util.find_spec(package) is None:
+            raise ImportError(f'Package {package} is not available.')
+    for file_extension in module.FILE_EXTENSIONS:
+        if not file_extension.startswith('.'):
+            raise ValueError(f'The file extension {file_extension} of module '
+                             f'{_module_name(module)} does not start with a dot.')
+        other_module = _FILE_EXTENSION_MODULES.get(file_extension)
+        if other_module is not None:
+            raise ValueError(f'The file extension {file_extension} of module '
+                             f'{_module_name(module)} is already registered by module '
+                             f'{_module_name(other_module)}.')
+    SUPPORTED_MODULES.append(module)
+    for file_extension in module.FILE_EXTENSIONS:
+        _FILE_EXTENSION_MODULES[file_extension] = module
+    _update_supported_file_extensions()
+    return module
+
+
+def unregister_module(module):
+    """
+    Unregisters a module registered by :func:`register_module`.
+
+    Parameters
+    ----------
+    module : types.ModuleType
+        The registered module.
+    """
+
+    SUPPORTED_MODULES.remove(module)
+    for file_extension in module.FILE_EXTENSIONS:
+        del _FILE_EXTENSION_MODULES[file_extension]
+    _update_supported_file_extensions()
+
+
+def _entry_points(group):
+    try:
+        import importlib.metadata as metadata
+    except ImportError:
+        # backport for Python < 3.8
+        try:
+            import importlib_metadata as metadata
+        except ImportError:
+            warnings.warn(f'Neither importlib.metadata nor importlib_metadata is available. '
+                          f'Thus modules of entry points in the group {group} are not '
+                          f'registered.', category=ImportWarning)
+            return ()
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, 'select'):
+        return entry_points.select(group=group)
+    return entry_points.get(group, ())
+
+
+def _register_entry_point_modules():
+    # importing importlib.metadata is expensive, thus this is done on first use
+    global _entry_point_modules_registered
+    if not _entry_point_modules_registered:
+        _entry_point_modules_registered = True
+        for entry_point in _entry_points(ENTRY_POINT_GROUP):
+            try:
+                register_module(entry_point.load())
+            except (ImportError, ValueError) as error:
+                warnings.warn(f'Module {entry_point.value} of entry point {entry_point.name} '
+                              f'could not be registered: {error}', category=ImportWarning)
+
+
+# the modules import their required packages only when a file is loaded or saved
 for module_string in ('convert.scipy', 'convert.numpy'):
     try:
-        module = importlib.import_module(module_string)
+        register_module(module_string)
     except ImportError:
         warnings.warn(f'Model {module_string} could not be imported. '
                       f'Thus the related functions are not available.',
                       category=ImportWarning)
-    else:
-        SUPPORTED_MODULES.append(module)
-
-SUPPORTED_FILE_EXTENSIONS = [file_extension
-                             for module in SUPPORTED_MODULES
-                             for file_extension in module.FILE_EXTENSIONS]
-
-SUPPORTED_FILE_EXTENSION_COMBINATIONS = [(file_extension_1, file_extension_2)
-                                         for module in SUPPORTED_MODULES
-                                         for file_extension_1 in module.FILE_EXTENSIONS
-                                         for file_extension_2 in module.FILE_EXTENSIONS]
 
 
 def _module_and_file_extension(file):
-    file = str(file)
-    for module in SUPPORTED_MODULES:
-        for file_extension in module.FILE_EXTENSIONS:
-            if file.endswith(file_extension):
-                return module, file_extension
+    _register_entry_point_modules()
+    # longest registered suffix of the file name starting with a dot
+    file_name = os.path.basename(str(file))
+    start = file_name.find('.')
+    while start >= 0:
+        file_extension = file_name[start:]
+        module = _FILE_EXTENSION_MODULES.get(file_extension)
+        if module is not None:
+            return module, file_extension
+        start = file_name.find('.', start + 1)
     raise UnsupportedFileExtensionError(file, supported_file_extensions=SUPPORTED_FILE_EXTENSIONS)
 
 
-def _io_function(file, mode, module, file_extension):
-    assert mode in ('r', 'w')
+# cancellation of atomic writes in the current thread (used by convert.aio)
+_thread_state = threading.local()
+
+
+class _WriteCancelledError(Exception):
+    """ The write was cancelled. """
+
+
+def _create_tmp_file(directory, file_name):
+    """ Creates an empty hidden file in `directory` whose name ends with `file_name`. """
+    # the temporary file keeps all file extensions
+    while True:
+        tmp_file = os.path.join(directory, f'.{os.urandom(6).hex()}.{file_name}')
+        try:
+            os.close(os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+        except FileExistsError:
+            continue
+        return tmp_file
+
+
+def _chmod_unlinked(file, mode):
+    """ Sets the mode of `file`. If `file` is hard linked, e.g. to an entry of a
+    :class:`convert.cache.ConversionCache`, it is replaced by a copy first so that the mode of the
+    other links is kept. """
+    file_stat = os.stat(file)
+    if stat.S_IMODE(file_stat.st_mode) == mode:
+        return
+    if file_stat.st_nlink > 1:
+        import shutil
+        directory, file_name = os.path.split(file)
+        copied_file = _create_tmp_file(directory, file_name)
+        try:
+            shutil.copyfile(file, copied_file)
+            os.replace(copied_file, file)
+        except BaseException:
+            if os.path.lexists(copied_file):
+                os.remove(copied_file)
+            raise
+    os.chmod(file, mode)
+
+
+@contextlib.contextmanager
+def _atomic_file(file, fsync=False):
+    """ Yields a temporary file in the directory of `file` which replaces `file` on success. """
+    file = os.path.realpath(file)
+    directory, file_name = os.path.split(file)
+    tmp_file = _create_tmp_file(directory, file_name)
+    try:
+        yield tmp_file
+        cancel_event = getattr(_thread_state, 'cancel_event', None)
+        if cancel_event is not None and cancel_event.is_set():
+            raise _WriteCancelledError(f'Writing {file} was cancelled.')
+        try:
+            mode = stat.S_IMODE(os.stat(file).st_mode)
+        except FileNotFoundError:
+            pass
+        else:
+            _chmod_unlinked(tmp_file, mode)
+        if fsync:
+            _fsync(tmp_file)
+        os.replace(tmp_file, file)
+    except BaseException:
+        if os.path.lexists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    if fsync and os.name == 'posix':
+        _fsync(directory)
+
+
+def _fsync(file):
+    file_descriptor = os.open(file, os.O_RDONLY)
+    try:
+        os.fsync(file_descriptor)
+    finally:
+        os.close(file_descriptor)
 
-    # check if compress file extension
+
+def _split_file_extension(file_extension):
     try:
         compress_file_extension = convert.compress.compress_file_extension(file_extension)
     except UnsupportedFileExtensionError:
         compress_file_extension = None
     else:
         file_extension = file_extension[: len(file_extension) - len(compress_file_extension)]
+    return file_extension, compress_file_extension
+
+
+def _open_function(file, mode, module, file_extension,
+                   compression_level=None, compression_threads=None, binary=None, wrap=True):
+    assert mode in ('r', 'w')
+
+    # check if compress file extension
+    file_extension, compress_file_extension = _split_file_extension(file_extension)
 
     # apply binary or text mode
-    binary_mode = module.BINARY_MODE_DICT[file_extension]
-    if binary_mode:
+    if binary is None:
+        binary = module.BINARY_MODE_DICT[file_extension]
+    if binary:
         mode += 'b'
     else:
         mode += 't'
 
     # open function
     if compress_file_extension is None:
-        def open_function():
+        def open_file():
             return open(file, mode=mode)
     else:
-        def open_function():
-            return convert.compress.compress_file_object(file, mode=mode)
+        def open_file(file_object=None):
+            return convert.compress.compress_file_object(
+                file, mode=mode, level=compression_level, threads=compression_threads,
+                file_object=file_object)
+
+    # report progress of read file
+    def open_progress_file():
+        progress = convert.progress.current_progress()
+        if (progress is None or not wrap or not mode.startswith('r') or
+                progress[0] != os.path.abspath(file)):
+            return open_file()
+        return convert.progress.open_file(open_file, file, compress_file_extension is not None)
+
+    # measure file object if traced
+    def open_function():
+        trace = convert.trace.current_trace()
+        if trace is None:
+            return open_progress_file()
+        return trace.open(open_progress_file, file, mode, wrap=wrap)
+
+    # return
+    return open_function, file_extension
+
+
+def _io_function(file, mode, module, file_extension,
+                 compression_level=None, compression_threads=None, **kwargs):
+    # memory-mapping needs the real file object
+    open_function, file_extension = _open_function(file, mode, module, file_extension,
+                                                   compression_level=compression_level,
+                                                   compression_threads=compression_threads,
+                                                   wrap=not kwargs.get('mmap', False))
 
     #
     if mode.startswith('r'):
         def io_function():
             with open_function() as file_object:
-                return module.load(file_object, file_extension)
+                return module.load(file_object, file_extension, **kwargs)
     else:
         def io_function(value):
             with open_function() as file_object:
-                return module.save(file_object, file_extension, value)
+                return module.save(file_object, file_extension, value, **kwargs)
 
     # return
     return io_function
 
 
-def _load(file, module, file_extension):
-    io_function = _io_function(file, 'r', module, file_extension)
+def _load(file, module, file_extension, **kwargs):
+    io_function = _io_function(file, 'r', module, file_extension, **kwargs)
     return io_function()
 
 
-def load(file):
+def _slice_options(module, file_extension, rows=None, columns=None):
+    options = {}
+    for name, index, supported_file_extensions in (
+            ('rows', rows, getattr(module, 'ROW_SLICE_FILE_EXTENSIONS', ())),
+            ('columns', columns, getattr(module, 'COLUMN_SLICE_FILE_EXTENSIONS', ()))):
+        if index is not None:
+            if file_extension not in supported_file_extensions:
+                raise ValueError(f'A slice of {name} can not be loaded from a {file_extension} '
+                                 f'file.')
+            options[name] = index
+    return options
+
+
+def load(file, mmap=False, cache=None, rows=None, columns=None):
     """
     Loads a value.
 
@@ -115,23 +400,60 @@ def load(file):
     ----------
     file : str or pathlib.Path
         The file that should be loaded.
+    mmap : bool, optional
+        If true, arrays stored in uncompressed `.npy` files are returned as read-only
+        memory-mapped arrays instead of being read into memory. The same applies to the array
+        in an uncompressed `.npz` file with a single array (see `compressed` of :func:`save`)
+        and to the arrays of sparse matrices in uncompressed `.npz` files, so that opening takes
+        the same time for any size. Since SciPy sorts and sums duplicate entries in place, the
+        arrays of sparse matrices are mapped copy-on-write instead of read-only, so changes are
+        not written to the file. For other files, including `.npz` files with several arrays,
+        this option is ignored. Default: false.
+    rows : slice, optional
+        Only these rows of a sparse matrix in a `.csr.npz` file are loaded. Only the row
+        pointers of these rows and their column indices and data are read from the file.
+        Default: all rows.
+    columns : slice, optional
+        Only these columns of a sparse matrix in a `.csc.npz` file are loaded, like `rows`.
+        Default: all columns.
+    cache : convert.cache.LoadCache, optional
+        A cache of loaded values. If the value of `file` is cached and `file` was not modified
+        since then, the cached value is returned. Otherwise the loaded value is cached if it is
+        an array or a sparse matrix which fits into the cache. Arrays and sparse matrices are
+        returned read-only. Default: no cache.
 
     Returns
     -------
     object
-        The value stored in `file`.
+        The value stored in `file`. For `.npz` files with several arrays, a read-only mapping
+        from the names to the arrays is returned. Each array is only decompressed when it is
+        accessed. The mapping should be closed after use, e.g. by using it as context manager.
     """
 
     module, file_extension = _module_and_file_extension(file)
-    return _load(file, module, file_extension)
+    options = _slice_options(module, file_extension, rows=rows, columns=columns)
+    if cache is not None:
+        return cache.load(file, lambda: load(file, mmap=mmap, **options), mmap=mmap, **options)
+    with convert.trace.trace('load', file_from=file):
+        return _load(file, module, file_extension, mmap=mmap, **options)
+
+
+def _save(file, module, file_extension, value, compression_level=None, compression_threads=None,
+          **kwargs):
+    io_function = _io_function(file, 'w', module, file_extension,
+                               compression_level=compression_level,
+                               compression_threads=compression_threads, **kwargs)
+    return io_function(value)
 
 
-def _save(file, module, file_extension, value):
-    io_function = _io_function(file, 'w', module, file_extension)
-    return io_function(value)
+def _save_options(module, file_extension, compressed=True):
+    if not compressed and file_extension in getattr(module, 'UNCOMPRESSED_SAVE_FILE_EXTENSIONS', ()):
+        return {'compressed': False}
+    return {}
 
 
-def save(file, value):
+def save(file, value, compression_level=None, compression_threads=None, fsync=False,
+         compressed=True):
     """
     Saves a value.
 
@@ -140,40 +462,218 @@ def save(file, value):
     file : str or pathlib.Path
         The file where `value` should be saved.
     value : object
-        The value that should be saved.
+        The value that should be saved. For `.npz` files, this can also be a mapping from names
+        to arrays. Each array is stored under its name.
+    compression_level : int or str, optional
+        The compression level used if `file` has a compression file extension. Either a level
+        of the compression algorithm (1 to 9 for gzip and bz2, 0 to 9 for xz, 1 to 22 for zstd,
+        0 to 16 for lz4) or one of the presets 'fast', 'balanced' or 'small'.
+        Default: 9 for gzip and bz2, 6 for xz, 3 for zstd and 0 for lz4.
+    compression_threads : int, optional
+        The number of threads used to compress the file if it has a compression file extension.
+        If greater than one, independent blocks are compressed in parallel and written as a
+        multi-member gzip, multi-stream bz2, multi-stream xz or multi-frame lz4 file. zstd files
+        are compressed by the threads of the zstd library. Default: one thread.
+    fsync : bool, optional
+        If true, the file and its directory are flushed to the storage device before this
+        function returns. Default: false.
+    compressed : bool, optional
+        If false, the arrays in `.npz` files (including the sparse matrix formats) are stored
+        in uncompressed zip members. Saving is then only limited by the speed of the storage
+        device. The data of each array starts at a multiple of 64 bytes in the file so that it
+        can be memory-mapped. For other files this option is ignored. Default: true.
+
+    Notes
+    -----
+    The value is written into a temporary file in the same directory which then replaces `file`
+    atomically. Thus, `file` is never observed partially written, and nothing is left behind if
+    saving fails or is interrupted.
     """
 
     module, file_extension = _module_and_file_extension(file)
-    return _save(file, module, file_extension, value)
+    options = _save_options(module, file_extension, compressed=compressed)
+    with _atomic_file(file, fsync=fsync) as tmp_file, convert.trace.trace('save', file_to=file):
+        _save(tmp_file, module, file_extension, value,
+              compression_level=compression_level, compression_threads=compression_threads,
+              **options)
+
+
+def _supports_chunks(module_from, file_extension_from, module_to, file_extension_to):
+    if module_from is not module_to:
+        return True
+    file_extension_from, _ = _split_file_extension(file_extension_from)
+    file_extension_to, _ = _split_file_extension(file_extension_to)
+    return (file_extension_from in getattr(module_from, 'CHUNKED_LOAD_FILE_EXTENSIONS', ()) and
+            file_extension_to in getattr(module_to, 'CHUNKED_SAVE_FILE_EXTENSIONS', ()))
+
+
+def _convert_chunks(file_from, module_from, file_extension_from,
+                    file_to, module_to, file_extension_to, chunk_size=None,
+                    compression_level=None, compression_threads=None, **kwargs):
+    open_function_from, file_extension_from = _open_function(
+        file_from, 'r', module_from, file_extension_from)
+    open_function_to, file_extension_to = _open_function(
+        file_to, 'w', module_to, file_extension_to,
+        compression_level=compression_level, compression_threads=compression_threads)
+    with open_function_from() as file_object_from:
+        shape, dtype, chunks = module_from.load_chunks(
+            file_object_from, file_extension_from, chunk_size=chunk_size)
+        with open_function_to() as file_object_to:
+            module_to.save_chunks(file_object_to, file_extension_to, shape, dtype, chunks, **kwargs)
+
+
+def _supports_copy(module_from, file_extension_from, module_to, file_extension_to):
+    if module_from is not module_to:
+        return False
+    file_extension_from, _ = _split_file_extension(file_extension_from)
+    file_extension_to, _ = _split_file_extension(file_extension_to)
+    return ((file_extension_from, file_extension_to) in
+            getattr(module_from, 'COPY_FILE_EXTENSION_COMBINATIONS', ()))
+
+
+def _convert_copy(file_from, file_extension_from, file_to, file_extension_to, module,
+                  compression_level=None, compression_threads=None):
+    open_function_from, file_extension_from = _open_function(
+        file_from, 'r', module, file_extension_from)
+    open_function_to, file_extension_to = _open_function(
+        file_to, 'w', module, file_extension_to,
+        compression_level=compression_level, compression_threads=compression_threads)
+    with open_function_from() as file_object_from:
+        with open_function_to() as file_object_to:
+            module.copy_file_object(file_object_from, file_extension_from,
+                                    file_object_to, file_extension_to)
+
+
+def _recompress(file_from, module_from, file_extension_from,
+                file_to, module_to, file_extension_to,
+                compression_level=None, compression_threads=None):
+    open_function_from, _ = _open_function(
+        file_from, 'r', module_from, file_extension_from, binary=True)
+    open_function_to, _ = _open_function(
+        file_to, 'w', module_to, file_extension_to, binary=True,
+        compression_level=compression_level, compression_threads=compression_threads)
+    with open_function_from() as file_object_from:
+        with open_function_to() as file_object_to:
+            convert.compress.copy_file_object(file_object_from, file_object_to)
+
+
+def _convert_file(file_from, module_from, file_extension_from,
+                  file_to, module_to, file_extension_to, chunk_size=None,
+                  compression_level=None, compression_threads=None, **kwargs):
+    # options of the saved file rule out copying the bytes
+    if (len(kwargs) == 0 and
+            _split_file_extension(file_extension_from)[0] == _split_file_extension(file_extension_to)[0]):
+        # only the compression differs
+        _recompress(file_from, module_from, file_extension_from,
+                    file_to, module_to, file_extension_to,
+                    compression_level=compression_level, compression_threads=compression_threads)
+    elif len(kwargs) == 0 and _supports_copy(module_from, file_extension_from,
+                                             module_to, file_extension_to):
+        _convert_copy(file_from, file_extension_from, file_to, file_extension_to, module_from,
+                      compression_level=compression_level,
+                      compression_threads=compression_threads)
+    elif _supports_chunks(module_from, file_extension_from, module_to, file_extension_to):
+        _convert_chunks(file_from, module_from, file_extension_from,
+                        file_to, module_to, file_extension_to, chunk_size=chunk_size,
+                        compression_level=compression_level,
+                        compression_threads=compression_threads, **kwargs)
+    else:
+        array = _load(file_from, module_from, file_extension_from)
+        _save(file_to, module_to, file_extension_to, array,
+              compression_level=compression_level, compression_threads=compression_threads,
+              **kwargs)
 
 
-def convert_file(file_from, file_to):
+def convert_file(file_from, file_to, chunk_size=None, compression_level=None,
+                 compression_threads=None, cache=None, fsync=False, progress=None,
+                 compressed=True):
     """
     Converts a file into another file.
 
+    If the file extensions of both files differ only in their compression file extension, the
+    decompressed bytes are copied into the new file without loading the value. The same applies
+    to arrays converted between `.npy` and `.npz` files.
+
     Parameters
     ----------
     file_from : str or pathlib.Path
         The file that should be converted.
     file_to : str or pathlib.Path
         The file to which `file_from` should be converted.
+    chunk_size : int, optional
+        The maximal number of bytes of the array which are held in memory at once if the
+        conversion can be carried out block by block. This is the case for dense arrays stored in
+        `.npy` or `.npz` files (or their compressed variants). Otherwise the whole value is loaded.
+        A sparse matrix is converted to a dense array and vice versa by blocks of rows of this
+        size so that never a full dense and a full sparse copy are held at once.
+        Default: 64 MiB.
+    compression_level : int or str, optional
+        The compression level used if `file_to` has a compression file extension
+        (see :func:`save`).
+    compression_threads : int, optional
+        The number of threads used to compress `file_to` if it has a compression file extension
+        (see :func:`save`). Default: one thread.
+    cache : convert.cache.ConversionCache or str or pathlib.Path, optional
+        A cache of converted files or the directory of such a cache. If `file_from` was already
+        converted with the same options into a file with the file extension of `file_to`, the
+        cached file is used instead of converting again. Default: no cache.
+    fsync : bool, optional
+        If true, `file_to` and its directory are flushed to the storage device before this
+        function returns. Default: false.
+    progress : callable, optional
+        A function which is called repeatedly with the number of bytes of `file_from` which
+        were read so far and the size of `file_from`, both as stored on disk (i.e. compressed
+        if `file_from` is compressed). It is called a last time with both equal to the size when
+        the conversion has finished. :class:`convert.progress.ProgressBar` prints the progress.
+        Default: no progress is reported.
+    compressed : bool, optional
+        If false, the arrays are stored uncompressed and aligned if `file_to` is a `.npz` file
+        (see :func:`save`). Default: true.
+
+    Notes
+    -----
+    `file_to` is written atomically (see :func:`save`).
     """
 
-    if file_from != file_to:
+    if os.path.abspath(file_from) != os.path.abspath(file_to):
         module_from, file_extension_from = _module_and_file_extension(file_from)
         module_to, file_extension_to = _module_and_file_extension(file_to)
 
-        if (file_extension_from, file_extension_to) not in SUPPORTED_FILE_EXTENSION_COMBINATIONS:
+        if not _supports_conversion(module_from, module_to):
             raise UnsupportedConversionError(
                 file_from, file_to,
                 supported_file_extension_combinations=SUPPORTED_FILE_EXTENSION_COMBINATIONS)
 
-        array = _load(file_from, module_from, file_extension_from)
-        _save(file_to, module_to, file_extension_to, array)
+        options = _save_options(module_to, file_extension_to, compressed=compressed)
+        cache = convert.cache.conversion_cache(cache)
+        if cache is not None:
+            key = cache.key(file_from, file_extension_to, compression_level=compression_level,
+                            **options)
+
+        with _atomic_file(file_to, fsync=fsync) as tmp_file_to, convert.trace.trace(
+                'convert', file_from=file_from, file_to=file_to):
+            with convert.progress.report(file_from, progress):
+                cached = cache is not None and cache.get(key, tmp_file_to)
+                if not cached:
+                    _convert_file(file_from, module_from, file_extension_from,
+                                  tmp_file_to, module_to, file_extension_to,
+                                  chunk_size=chunk_size, compression_level=compression_level,
+                                  compression_threads=compression_threads, **options)
+
+        if cache is not None and not cached:
+            cache.put(key, file_to)
     return file_to
 
 
-def convert_file_extension(file, file_extension):
+def _replace_file_extension(file, file_extension):
+    file = str(file)
+    _, old_file_extension = _module_and_file_extension(file)
+    return file[: len(file) - len(old_file_extension)] + file_extension
+
+
+def convert_file_extension(file, file_extension, chunk_size=None, compression_level=None,
+                           compression_threads=None, cache=None, fsync=False, progress=None,
+                           compressed=True):
     """
     Converts a file into another file.
 
@@ -184,11 +684,127 @@ def convert_file_extension(file, file_extension):
     file_extension : str
         The new file extension that the converted file should have. The new file has the same
         filename as `file` only its file extension is replaced by `file_extension`.
+    chunk_size : int, optional
+        The maximal number of bytes of the array which are held in memory at once if the
+        conversion can be carried out block by block (see :func:`convert_file`).
+    compression_level : int or str, optional
+        The compression level used if the converted file has a compression file extension
+        (see :func:`save`).
+    compression_threads : int, optional
+        The number of threads used to compress the converted file if it has a compression file
+        extension (see :func:`save`). Default: one thread.
+    cache : convert.cache.ConversionCache or str or pathlib.Path, optional
+        A cache of converted files or the directory of such a cache (see :func:`convert_file`).
+        Default: no cache.
+    fsync : bool, optional
+        If true, the converted file and its directory are flushed to the storage device before
+        this function returns. Default: false.
+    progress : callable, optional
+        A function to which the progress of reading `file` is reported
+        (see :func:`convert_file`). Default: no progress is reported.
+    compressed : bool, optional
+        If false, the arrays are stored uncompressed and aligned if the converted file is a
+        `.npz` file (see :func:`save`). Default: true.
     """
 
-    file = str(file)
-    _, old_file_extension = _module_and_file_extension(file)
-    file_to = file[: len(file) - len(old_file_extension)] + file_extension
-
-    convert_file(file, file_to)
+    file_to = _replace_file_extension(file, file_extension)
+    convert_file(file, file_to, chunk_size=chunk_size, compression_level=compression_level,
+                 compression_threads=compression_threads, cache=cache, fsync=fsync,
+                 progress=progress, compressed=compressed)
     return file_to
+
+
+ConversionSummary = collections.namedtuple('ConversionSummary', ('converted', 'failed'))
+ConversionSummary.__doc__ = """
+    The summary of the conversions of :func:`convert.convert_many`.
+
+    Attributes
+    ----------
+    converted : list of tuple
+        The successfully converted pairs `(file_from, file_to)`.
+    failed : list of tuple
+        The tuples `(file_from, file_to, error)` of the failed conversions.
+    """
+
+
+def _file_size(file):
+    try:
+        return os.path.getsize(file)
+    except OSError:
+        return 0
+
+
+def convert_many(pairs, workers=None, progress=None, **kwargs):
+    """
+    Converts many files into other files.
+
+    A failed conversion does not stop the conversion of the other files. Instead, the error is
+    recorded in the returned summary.
+
+    Parameters
+    ----------
+    pairs : iterable of tuple
+        Pairs `(file_from, file_to)` of files which should be converted (see :func:`convert_file`).
+    workers : int, optional
+        The number of processes used to convert the files. If one, the files are converted in
+        the current process. Default: the number of processors of the machine.
+    progress : callable, optional
+        A function which is called with the summed number of read bytes and the summed size of
+        all files `file_from` (see :func:`convert_file`). If several processes are used, the
+        progress is reported each time a conversion has finished. Default: no progress is
+        reported.
+    **kwargs
+        Further keyword arguments passed to :func:`convert_file`.
+
+    Returns
+    -------
+    convert.universal.ConversionSummary
+        A named tuple with the attributes `converted`, a list with the successfully converted
+        pairs `(file_from, file_to)`, and `failed`, a list with tuples
+        `(file_from, file_to, error)` for each failed conversion.
+    """
+
+    pairs = [(file_from, file_to) for file_from, file_to in pairs]
+    converted = []
+    failed = []
+
+    # progress of all files
+    if progress is not None:
+        sizes = [_file_size(file_from) for file_from, file_to in pairs]
+        total_size = sum(sizes)
+        read_size = 0
+
+    if workers == 1:
+        for i, (file_from, file_to) in enumerate(pairs):
+            if progress is not None:
+                def file_progress(size, file_size, offset=read_size):
+                    progress(offset + size, total_size)
+                kwargs['progress'] = file_progress
+            try:
+                convert_file(file_from, file_to, **kwargs)
+            except Exception as error:
+                failed.append((file_from, file_to, error))
+            else:
+                converted.append((file_from, file_to))
+            if progress is not None:
+                read_size += sizes[i]
+                progress(read_size, total_size)
+    else:
+        import concurrent.futures
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(convert_file, file_from, file_to, **kwargs)
+                       for file_from, file_to in pairs]
+            if progress is not None:
+                future_sizes = dict(zip(futures, sizes))
+                for future in concurrent.futures.as_completed(futures):
+                    read_size += future_sizes[future]
+                    progress(read_size, total_size)
+            for (file_from, file_to), future in zip(pairs, futures):
+                try:
+                    future.result()
+                except Exception as error:
+                    failed.append((file_from, file_to, error))
+                else:
+                    converted.append((file_from, file_to))
+
+    return ConversionSummary(converted, failed)
@@ -175,3 +175,13 @@ intersphinx_mapping = {
     'https://docs.python.org/': None,
     'https://docs.scipy.org/doc/numpy/': None
 }
+
+
+# -- Options for nitpicky mode -----------------------------------------------
+
+# types in docstrings which are no classes
+nitpick_ignore = [
+    ('py:class', 'optional'),
+    ('py:class', 'callable'),
+    ('py:class', 'iterable'),
+]
@@ -64,16 +64,19 @@ setuptools.setup(
     packages=setuptools.find_packages(),
 
     # dependencies
-    python_requires='>=3.6',
+    python_requires='>=3.7',
     setup_requires=[
         'setuptools>=0.8',
         'pip>=1.4',
     ],
     install_requires=[
+        'importlib_metadata; python_version < "3.8"',
     ],
     extras_require={
         'numpy': ['numpy>=1.15'],
         'scipy': ['scipy>=0.10'],
+        'zstd': ['zstandard>=0.15'],
+        'lz4': ['lz4>=2.1'],
     },
     # scripts
     entry_points={